@@ -0,0 +1,463 @@
+"""
+Streaming ATOM reader and writer with a binary companion cache
+
+Reads and writes Maya .atom animation files in pure Python, one channel at
+a time so memory stays bounded by the largest channel, no Maya needed.
+The binary cache stores the keys of every channel as float arrays with an
+index at the end of the file, it is read through mmap so repeated imports
+of the same animation skip text parsing.
+
+Example:
+    for channel in atom.iter_channels('/tmp/shot.atom'):
+        print(channel.node, channel.attr, len(channel.keys.times))
+
+    with atom.load_channels('/tmp/shot.atom') as channels:  # cached
+        for channel in channels:
+            ...
+"""
+
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from collections import OrderedDict, namedtuple
+
+
+CACHE_EXTENSION = '.cache'
+CACHE_MAGIC = b'ATMC'
+CACHE_VERSION = 2
+# magic, version, source size, source mtime, channel count, index offset
+_CACHE_HEADER = struct.Struct('<4sHQdQQ')
+
+# tangent type names, stored as their index in the cache
+TANGENT_TYPES = (
+    'auto', 'clamped', 'fast', 'fixed', 'flat', 'linear', 'plateau',
+    'slow', 'spline', 'step', 'stepnext',
+)
+_TANGENT_CODES = dict((name, i) for i, name in enumerate(TANGENT_TYPES))
+
+# float arrays of a channel in cache order, followed by the byte arrays
+_FLOAT_FIELDS = (
+    'times', 'values', 'in_angles', 'in_weights', 'out_angles', 'out_weights')
+_BYTE_FIELDS = (
+    'in_types', 'out_types', 'tan_locks', 'weight_locks', 'breakdowns')
+
+AtomKeys = namedtuple('AtomKeys', _FLOAT_FIELDS + _BYTE_FIELDS)
+
+# depth and child_count of the dagNode statement, anim_indices are the
+# integers ending the anim statement
+AtomChannel = namedtuple(
+    'AtomChannel',
+    ['node', 'depth', 'child_count', 'attr_path', 'attr', 'anim_indices',
+     'output', 'weighted', 'pre_infinity', 'post_infinity', 'keys']
+)
+
+DEFAULT_HEADER = OrderedDict([
+    ('atomVersion', '1.0'),
+    ('mayaVersion', '2018'),
+    ('mayaType', 'maya'),
+    ('timeUnit', 'film'),
+    ('linearUnit', 'cm'),
+    ('angularUnit', 'deg'),
+])
+
+
+def new_keys():
+    """
+    :return: AtomKeys. empty key arrays
+    """
+    return AtomKeys(*(
+        [array('d') for _ in _FLOAT_FIELDS]
+        + [array('B') for _ in _BYTE_FIELDS]
+    ))
+
+
+def _statements(stream):
+    """
+    Split an atom stream into statements
+
+    :param stream: file. text stream
+    :return: generator. (tokens, opens a block, closes a block)
+    """
+    for line in stream:
+        line = line.strip()
+        if not line:
+            continue
+        if line == '}':
+            yield [], 0, 1
+        elif line.endswith('{'):
+            yield line[:-1].split(), 1, 0
+        else:
+            yield line.rstrip(';').split(), 0, 0
+
+
+def _add_key(keys, tokens):
+    """
+    Parse a key statement:
+    time value inType outType tanLock weightLock breakdown
+    [inAngle inWeight] [outAngle outWeight], angles follow fixed tangents
+
+    :param keys: AtomKeys. key arrays to append to
+    :param tokens: list. statement tokens
+    """
+    in_type, out_type = tokens[2], tokens[3]
+    extra = iter(tokens[7:])
+    in_angle = in_weight = out_angle = out_weight = 0.0
+    if in_type == 'fixed':
+        in_angle, in_weight = float(next(extra)), float(next(extra))
+    if out_type == 'fixed':
+        out_angle, out_weight = float(next(extra)), float(next(extra))
+
+    keys.times.append(float(tokens[0]))
+    keys.values.append(float(tokens[1]))
+    keys.in_angles.append(in_angle)
+    keys.in_weights.append(in_weight)
+    keys.out_angles.append(out_angle)
+    keys.out_weights.append(out_weight)
+    keys.in_types.append(_TANGENT_CODES.get(in_type, 0))
+    keys.out_types.append(_TANGENT_CODES.get(out_type, 0))
+    keys.tan_locks.append(int(tokens[4]))
+    keys.weight_locks.append(int(tokens[5]))
+    keys.breakdowns.append(int(tokens[6]))
+
+
+def read_header(path):
+    """
+    Read the header statements before the first node block
+
+    :param path: str. atom file path
+    :return: OrderedDict. header name: value
+    """
+    header = OrderedDict()
+    with open(path) as f:
+        for tokens, opens, closes in _statements(f):
+            if opens or closes:
+                break
+            if tokens:
+                header[tokens[0]] = ' '.join(tokens[1:])
+    return header
+
+
+def _new_channel(node, depth=0, child_count=0, attr_path=None, attr=None,
+                 anim_indices=(0, 0, 0)):
+    """
+    :return: dict. AtomChannel fields with default values
+    """
+    return dict(
+        node=node,
+        depth=depth,
+        child_count=child_count,
+        attr_path=attr_path,
+        attr=attr,
+        anim_indices=list(anim_indices),
+        output=None,
+        weighted=0,
+        pre_infinity='constant',
+        post_infinity='constant',
+        keys=new_keys()
+    )
+
+
+def iter_channels(path):
+    """
+    Iterate the animated channels of an atom file, one channel is parsed
+    at a time
+
+    :param path: str. atom file path
+    :return: generator. AtomChannel
+    """
+    # names of the open blocks, outermost first
+    blocks = list()
+    node = None
+    depth = child_count = 0
+    channel = None
+    with open(path) as f:
+        for tokens, opens, closes in _statements(f):
+            if closes:
+                if blocks and blocks.pop() == 'animData' and channel:
+                    yield AtomChannel(**channel)
+                    channel = None
+                continue
+
+            if opens:
+                blocks.append(tokens[0] if tokens else '')
+                if len(blocks) == 1:
+                    # the first statement of a node block names the node
+                    node = None
+                elif blocks[-1] == 'animData' and channel is None:
+                    channel = _new_channel(node, depth, child_count)
+                continue
+
+            if not tokens or not blocks:
+                continue
+            block = blocks[-1]
+            if block == 'keys':
+                _add_key(channel['keys'], tokens)
+            elif block == 'animData':
+                name, value = tokens[0], tokens[-1]
+                if name == 'output':
+                    channel['output'] = value
+                elif name == 'weighted':
+                    channel['weighted'] = int(value)
+                elif name == 'preInfinity':
+                    channel['pre_infinity'] = value
+                elif name == 'postInfinity':
+                    channel['post_infinity'] = value
+            elif len(blocks) == 1:
+                if node is None:
+                    # nodeName depth childCount
+                    node = tokens[0]
+                    depth, child_count = [int(token) for token in tokens[1:3]]
+                elif tokens[0] == 'anim' and len(tokens) > 3:
+                    # anim attrPath attrName nodeName indices...
+                    channel = _new_channel(
+                        tokens[3],
+                        depth,
+                        child_count,
+                        tokens[1],
+                        tokens[2],
+                        [int(token) for token in tokens[4:]]
+                    )
+
+
+class AtomWriter(object):
+    """
+    Class streaming channels to an atom file, node blocks are opened and
+    closed as the node of the written channels changes
+    """
+
+    def __init__(self, path, header=None):
+        """
+        Initialization
+
+        :param path: str. atom file path
+        :param header: dict. header statements, DEFAULT_HEADER by default
+        """
+        self._file = open(path, 'w')
+        self._node = None
+        for name, value in (header or DEFAULT_HEADER).items():
+            self._file.write('{} {};\n'.format(name, value))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def write_channel(self, channel):
+        """
+        :param channel: AtomChannel. channel to write
+        """
+        write = self._file.write
+        if channel.node != self._node:
+            if self._node is not None:
+                write('}\n')
+            write('dagNode {{\n  {} {} {};\n'.format(
+                channel.node, channel.depth, channel.child_count))
+            self._node = channel.node
+
+        write('  anim {} {} {} {};\n'.format(
+            channel.attr_path,
+            channel.attr,
+            channel.node,
+            ' '.join(str(index) for index in channel.anim_indices)
+        ))
+        write('  animData {\n')
+        write('    input time;\n')
+        if channel.output:
+            write('    output {};\n'.format(channel.output))
+        write('    weighted {};\n'.format(int(channel.weighted)))
+        write('    preInfinity {};\n'.format(channel.pre_infinity))
+        write('    postInfinity {};\n'.format(channel.post_infinity))
+        write('    keys {\n')
+        keys = channel.keys
+        for i in range(len(keys.times)):
+            in_type = TANGENT_TYPES[keys.in_types[i]]
+            out_type = TANGENT_TYPES[keys.out_types[i]]
+            tokens = [
+                repr(keys.times[i]), repr(keys.values[i]),
+                in_type, out_type, str(keys.tan_locks[i]),
+                str(keys.weight_locks[i]), str(keys.breakdowns[i])
+            ]
+            if in_type == 'fixed':
+                tokens += [repr(keys.in_angles[i]), repr(keys.in_weights[i])]
+            if out_type == 'fixed':
+                tokens += [
+                    repr(keys.out_angles[i]), repr(keys.out_weights[i])]
+            write('      {};\n'.format(' '.join(tokens)))
+        write('    }\n  }\n')
+
+    def close(self):
+        """
+        Close the last node block and the file
+        """
+        if self._file.closed:
+            return
+        if self._node is not None:
+            self._file.write('}\n')
+        self._file.close()
+
+
+def get_cache_path(path):
+    """
+    :param path: str. atom file path
+    :return: str. binary cache path
+    """
+    return path + CACHE_EXTENSION
+
+
+def _get_source_stamp(path):
+    """
+    :param path: str. atom file path
+    :return: tuple. (size, mtime) identifying the source file version
+    """
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime
+
+
+def build_cache(path, cache_path=None):
+    """
+    Convert an atom file to the binary cache, streaming one channel at a time
+
+    :param path: str. atom file path
+    :param cache_path: str. cache path, next to the atom file by default
+    :return: str. cache path
+    """
+    cache_path = cache_path or get_cache_path(path)
+    size, mtime = _get_source_stamp(path)
+    index = list()
+    with open(cache_path, 'wb') as f:
+        f.write(b'\0' * _CACHE_HEADER.size)
+        for channel in iter_channels(path):
+            entry = channel._asdict()
+            keys = entry.pop('keys')
+            entry['count'] = len(keys.times)
+            entry['offset'] = f.tell()
+            index.append(entry)
+            for data in keys:
+                if sys.byteorder != 'little' and data.typecode == 'd':
+                    data = array('d', data)
+                    data.byteswap()
+                data.tofile(f)
+
+        index_offset = f.tell()
+        f.write(json.dumps({
+            'header': read_header(path),
+            'channels': index,
+        }).encode('utf-8'))
+        f.seek(0)
+        f.write(_CACHE_HEADER.pack(
+            CACHE_MAGIC, CACHE_VERSION, size, mtime, len(index), index_offset))
+    return cache_path
+
+
+class AtomCache(object):
+    """
+    Class for a binary atom cache read through mmap, the header statements
+    and channel index are read on open, key arrays of a channel are only
+    read when the channel is accessed
+    """
+
+    def __init__(self, cache_path):
+        """
+        Initialization
+
+        :param cache_path: str. binary cache path
+        :raise ValueError: the file is not a readable atom cache
+        """
+        self._file = open(cache_path, 'rb')
+        self._mmap = None
+        try:
+            self._mmap = mmap.mmap(
+                self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            (magic, version, self.source_size, self.source_mtime, count,
+             index_offset) = _CACHE_HEADER.unpack(
+                self._mmap[:_CACHE_HEADER.size])
+            if magic != CACHE_MAGIC or version != CACHE_VERSION:
+                raise ValueError('unknown magic or version')
+            index = json.loads(
+                self._mmap[index_offset:].decode('utf-8'),
+                object_pairs_hook=OrderedDict
+            )
+            self.header = index['header']
+            self.index = index['channels']
+            if len(self.index) != count:
+                raise ValueError('channel count mismatch')
+        # empty, truncated or corrupted files fail anywhere while unpacking
+        except Exception as e:
+            self.close()
+            raise ValueError('{} is not a readable atom cache: {}'.format(
+                cache_path, e))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __len__(self):
+        return len(self.index)
+
+    def __iter__(self):
+        for i in range(len(self.index)):
+            yield self.get_channel(i)
+
+    def _read(self, offset, count, typecode):
+        """
+        :return: array. values read from the mapped file
+        """
+        data = array(typecode)
+        size = count * data.itemsize
+        # python 2 arrays only have fromstring
+        read = getattr(data, 'frombytes', None) or data.fromstring
+        read(self._mmap[offset:offset + size])
+        if sys.byteorder != 'little' and typecode == 'd':
+            data.byteswap()
+        return data
+
+    def get_channel(self, i):
+        """
+        :param i: int. channel index
+        :return: AtomChannel.
+        """
+        entry = dict(self.index[i])
+        count = entry.pop('count')
+        offset = entry.pop('offset')
+        fields = list()
+        for _ in _FLOAT_FIELDS:
+            fields.append(self._read(offset, count, 'd'))
+            offset += count * 8
+        for _ in _BYTE_FIELDS:
+            fields.append(self._read(offset, count, 'B'))
+            offset += count
+        return AtomChannel(keys=AtomKeys(*fields), **entry)
+
+    def close(self):
+        if self._mmap is not None:
+            self._mmap.close()
+        self._file.close()
+
+
+def load_channels(path):
+    """
+    Load the channels of an atom file through its binary cache, the cache
+    is (re-)built when missing, unreadable, of another version or older
+    than the file
+
+    :param path: str. atom file path
+    :return: AtomCache.
+    """
+    cache_path = get_cache_path(path)
+    if os.path.exists(cache_path):
+        try:
+            cache = AtomCache(cache_path)
+        except ValueError:
+            cache = None
+        if cache is not None:
+            stamp = (cache.source_size, cache.source_mtime)
+            if stamp == _get_source_stamp(path):
+                return cache
+            cache.close()
+    return AtomCache(build_cache(path, cache_path))
@@ -0,0 +1,204 @@
+"""
+DG context sampling bake engine
+
+Instead of stepping global time and evaluating the whole scene every frame
+like cmds.bakeResults(simulation=1), the baked plugs are pulled in a DG
+context per frame so only their upstream subgraph is evaluated, the samples
+are kept in arrays and written with one MFnAnimCurve.addKeys per plug.
+Scene modifications are done through the API and are not undoable.
+
+Example:
+    timings = bake.bake_plugs(['ctrl_L_hand', 'ctrl_R_hand'], 1001, 1240)
+    # OrderedDict([('graph', 0.01), ('sample', 0.2), ('write', 0.05)])
+"""
+
+import logging
+import time
+from array import array
+from collections import OrderedDict
+
+from maya.api import OpenMaya as om
+
+from ..common import dag, snapshot
+
+
+logger = logging.getLogger(__name__)
+
+# node types that need sequential evaluation, use key.bake_keys() instead
+SIMULATION_TYPES = (
+    'nucleus',
+    'nCloth',
+    'nParticle',
+    'hairSystem',
+    'particle',
+    'rigidSolver',
+)
+
+
+def get_bake_plugs(nodes, attrs=None):
+    """
+    Get the plugs to bake
+
+    :param nodes: list. maya nodes
+    :param attrs: list. attribute names, defaults to all keyable unlocked
+                  attributes holding a single number
+    :return: list. MPlug
+    """
+    mobjects = dag.get_dag_nodes(nodes)
+    plugs = list()
+    for mobject in mobjects:
+        if attrs is None:
+            plugs.extend(
+                plug for _, plug in snapshot.iter_channel_plugs(mobject)
+                if plug.isKeyable and not plug.isLocked
+            )
+        else:
+            fn_node = om.MFnDependencyNode(mobject)
+            plugs.extend(fn_node.findPlug(attr, False) for attr in attrs)
+    return plugs
+
+
+def check_subgraph(plugs):
+    """
+    Check that the upstream subgraph of the plugs can be sampled out of order
+
+    :param plugs: list. MPlug
+    :return: int. number of upstream nodes
+    """
+    handles = dict()
+    for plug in plugs:
+        for handle in dag.get_upstream_nodes(plug.node()):
+            key = handle.hashCode()
+            if key in handles:
+                continue
+            handles[key] = handle
+
+            fn_node = om.MFnDependencyNode(handle.object())
+            if fn_node.typeName in SIMULATION_TYPES:
+                raise ValueError(
+                    '{} is driven by simulation node {}, bake with '
+                    'simulation instead'.format(plug.name(), fn_node.name()))
+    return len(handles)
+
+
+def sample_plugs(plugs, times):
+    """
+    Sample plug values in a DG context per frame
+
+    :param plugs: list. MPlug
+    :param times: list. MTime
+    :return: list. array of values per plug, in internal units
+    """
+    samples = [array('d') for _ in plugs]
+    for mtime in times:
+        previous = om.MDGContext(mtime).makeCurrent()
+        try:
+            for plug, values in zip(plugs, samples):
+                values.append(plug.asDouble())
+        finally:
+            previous.makeCurrent()
+    return samples
+
+
+def write_keys(plugs, times, samples, tangent=om.MFnAnimCurve.kTangentAuto):
+    """
+    Write sampled values as keys, existing keys in the sampled range are
+    replaced and keys outside of it are preserved, plugs driven by anything
+    other than an anim curve are disconnected first
+
+    :param plugs: list. MPlug
+    :param times: list. MTime, sorted
+    :param samples: list. array of values per plug
+    :param tangent: MFnAnimCurve.TangentType. in and out tangent type
+    :return: list. anim curve names
+    """
+    modifier = om.MDGModifier()
+    curves = list()
+    for plug in plugs:
+        source = plug.source()
+        if not source.isNull and source.node().hasFn(om.MFn.kAnimCurve):
+            curves.append(source.node())
+            continue
+        if not source.isNull:
+            modifier.disconnect(source, plug)
+        curves.append(None)
+    modifier.doIt()
+
+    names = list()
+    for plug, curve, values in zip(plugs, curves, samples):
+        fn_curve = om.MFnAnimCurve()
+        if curve is None:
+            fn_curve.create(plug)
+        else:
+            fn_curve.setObject(curve)
+            for i in reversed(range(fn_curve.numKeys)):
+                if times[0] <= fn_curve.input(i) <= times[-1]:
+                    fn_curve.remove(i)
+        fn_curve.addKeys(times, values, tangent, tangent, True)
+        names.append(fn_curve.name())
+    return names
+
+
+def bake_plugs(
+        nodes,
+        start,
+        end,
+        attrs=None,
+        step=1,
+        reduce_keys=0,
+        tolerances=None):
+    """
+    Bake animation of specified nodes by sampling them in DG context
+
+    :param nodes: [str]. node names to bake
+    :param start: int. start frame
+    :param end: int. end frame
+    :param attrs: list. attribute names, see get_bake_plugs()
+    :param step: int. frame step between samples
+    :param reduce_keys: bool. reduce the baked keys, see
+                        reduction.reduce_anim_curves()
+    :param tolerances: float or list. maximum error of each baked plug
+                       when reducing keys
+    :return: OrderedDict. stage name: seconds
+    """
+    timings = OrderedDict()
+    unit = om.MTime.uiUnit()
+    times = [om.MTime(frame, unit) for frame in range(start, end + 1, step)]
+
+    stage_start = time.time()
+    plugs = get_bake_plugs(nodes, attrs)
+    subgraph_size = check_subgraph(plugs)
+    timings['graph'] = time.time() - stage_start
+
+    stage_start = time.time()
+    samples = sample_plugs(plugs, times)
+    timings['sample'] = time.time() - stage_start
+
+    stage_start = time.time()
+    anim_curves = write_keys(plugs, times, samples)
+    timings['write'] = time.time() - stage_start
+
+    if reduce_keys:
+        # key reduction needs numpy
+        from . import reduction
+
+        stage_start = time.time()
+        report = reduction.reduce_anim_curves(
+            anim_curves, start, end, tolerances)
+        timings['reduce'] = time.time() - stage_start
+        logger.info(
+            'reduced keys %sx (%s to %s), max error %g',
+            round(report['ratio'], 1),
+            report['keys_before'],
+            report['keys_after'],
+            report['max_error']
+        )
+
+    logger.info(
+        'baked %s plugs over %s frames (%s upstream nodes): %s',
+        len(plugs),
+        len(times),
+        subgraph_size,
+        ', '.join('{} {:.3f}s'.format(*item) for item in timings.items())
+    )
+    return timings
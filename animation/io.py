@@ -1,4 +1,62 @@
+import json
+import logging
+import struct
+import sys
+from array import array
+from collections import OrderedDict
+
 import maya.cmds as cmds
+from maya.api import OpenMaya as om
+
+from . import atom, bake
+from ..common import channel
+
+
+logger = logging.getLogger(__name__)
+
+# atom tangent type name: MFnAnimCurve tangent type
+ATOM_TANGENT_TYPES = {
+    'auto': om.MFnAnimCurve.kTangentAuto,
+    'clamped': om.MFnAnimCurve.kTangentClamped,
+    'fast': om.MFnAnimCurve.kTangentFast,
+    'fixed': om.MFnAnimCurve.kTangentFixed,
+    'flat': om.MFnAnimCurve.kTangentFlat,
+    'linear': om.MFnAnimCurve.kTangentLinear,
+    'plateau': om.MFnAnimCurve.kTangentPlateau,
+    'slow': om.MFnAnimCurve.kTangentSlow,
+    'spline': om.MFnAnimCurve.kTangentSmooth,
+    'step': om.MFnAnimCurve.kTangentStep,
+    'stepnext': om.MFnAnimCurve.kTangentStepNext,
+}
+
+# atom time unit name: MTime unit, other units are named like '120fps'
+ATOM_TIME_UNITS = {
+    'game': om.MTime.kGames,
+    'film': om.MTime.kFilm,
+    'pal': om.MTime.kPALFrame,
+    'ntsc': om.MTime.kNTSCFrame,
+    'show': om.MTime.kShowScan,
+    'palf': om.MTime.kPALField,
+    'ntscf': om.MTime.kNTSCField,
+    'hour': om.MTime.kHours,
+    'min': om.MTime.kMinutes,
+    'sec': om.MTime.kSeconds,
+    'millisec': om.MTime.kMilliseconds,
+}
+
+SAMPLES_MAGIC = b'ASMP'
+SAMPLES_VERSION = 1
+# magic, version, frame count, attribute count, attribute names size
+_SAMPLES_HEADER = struct.Struct('<4sHIII')
+
+# atom infinity type name: MFnAnimCurve infinity type
+ATOM_INFINITY_TYPES = {
+    'constant': om.MFnAnimCurve.kConstant,
+    'linear': om.MFnAnimCurve.kLinear,
+    'cycle': om.MFnAnimCurve.kCycle,
+    'cycleRelative': om.MFnAnimCurve.kCycleRelative,
+    'oscillate': om.MFnAnimCurve.kOscillate,
+}
 
 
 def create_export_node(attrs, node_name):
@@ -84,3 +142,269 @@ def import_attr_from_atom(fpath, target):
             "mapFile=;"
         ).format(import_node='', target_node=target)
     )
+
+
+def _get_value_converter(header, output):
+    """
+    Get the conversion of atom values to internal units
+
+    :param header: dict. atom header statements
+    :param output: str. atom channel output type
+    :return: function. converts a value
+    """
+    if output == 'angular':
+        unit = om.MAngle.kRadians
+        if header.get('angularUnit', 'deg') == 'deg':
+            unit = om.MAngle.kDegrees
+        return lambda value: om.MAngle(value, unit).asRadians()
+    if output == 'linear':
+        unit = om.MDistance.kCentimeters
+        units = {
+            'mm': om.MDistance.kMillimeters,
+            'm': om.MDistance.kMeters,
+            'in': om.MDistance.kInches,
+            'ft': om.MDistance.kFeet,
+            'yd': om.MDistance.kYards,
+            'km': om.MDistance.kKilometers,
+        }
+        unit = units.get(header.get('linearUnit', 'cm'), unit)
+        return lambda value: om.MDistance(value, unit).asCentimeters()
+    return float
+
+
+def _get_time_unit(header):
+    """
+    Get the time unit of atom key times
+
+    :param header: dict. atom header statements
+    :return: MTime.Unit. time unit, the scene time unit if not recognized
+    """
+    name = header.get('timeUnit', 'film')
+    unit = ATOM_TIME_UNITS.get(name)
+    if unit is None and name.endswith('fps'):
+        unit = getattr(
+            om.MTime, 'k{}FPS'.format(name[:-3].replace('.', '_')), None)
+    if unit is None:
+        logger.warning('unknown atom time unit %s, using scene unit', name)
+        unit = om.MTime.uiUnit()
+    return unit
+
+
+def _key_atom_channel(plug, atom_channel, convert, unit):
+    """
+    Replace the keys of a plug with the keys of an atom channel
+
+    :param plug: MPlug. destination plug
+    :param atom_channel: atom.AtomChannel. channel to key
+    :param convert: function. converts values to internal units
+    :param unit: MTime.Unit. time unit of the key times
+    :return: str. anim curve name
+    """
+    keys = atom_channel.keys
+    source = plug.source()
+    fn_curve = om.MFnAnimCurve()
+    if not source.isNull and source.node().hasFn(om.MFn.kAnimCurve):
+        fn_curve.setObject(source.node())
+        for i in reversed(range(fn_curve.numKeys)):
+            fn_curve.remove(i)
+    else:
+        fn_curve.create(plug)
+
+    fn_curve.addKeys(
+        [om.MTime(time, unit) for time in keys.times],
+        [convert(value) for value in keys.values]
+    )
+    fn_curve.setIsWeighted(bool(atom_channel.weighted))
+    fn_curve.setPreInfinityType(
+        ATOM_INFINITY_TYPES[atom_channel.pre_infinity])
+    fn_curve.setPostInfinityType(
+        ATOM_INFINITY_TYPES[atom_channel.post_infinity])
+
+    for i in range(len(keys.times)):
+        for is_in, types, angles, weights in (
+                (True, keys.in_types, keys.in_angles, keys.in_weights),
+                (False, keys.out_types, keys.out_angles, keys.out_weights)):
+            name = atom.TANGENT_TYPES[types[i]]
+            if is_in:
+                fn_curve.setInTangentType(i, ATOM_TANGENT_TYPES[name])
+            else:
+                fn_curve.setOutTangentType(i, ATOM_TANGENT_TYPES[name])
+            if name == 'fixed':
+                fn_curve.setAngle(
+                    i, om.MAngle(angles[i], om.MAngle.kDegrees), is_in)
+                fn_curve.setWeight(i, weights[i], is_in)
+    return fn_curve.name()
+
+
+def import_attr_from_atom_cache(fpath, target):
+    """
+    Import .atom on the specified target mobject without the atom translator,
+    the file is parsed once into its binary cache which later imports of
+    the same file read directly, keys of each channel replace the keys of
+    the target attribute with the same name. Not undoable
+
+    :param fpath: str. file path
+    :param target: str. maya object
+    :return: list. anim curve names
+    """
+    fn_node = om.MFnDependencyNode(
+        om.MSelectionList().add(target).getDependNode(0))
+
+    anim_curves = list()
+    with atom.load_channels(fpath) as channels:
+        unit = _get_time_unit(channels.header)
+        for atom_channel in channels:
+            if not fn_node.hasAttribute(atom_channel.attr):
+                logger.warning(
+                    '%s has no attribute %s, skipped',
+                    target,
+                    atom_channel.attr
+                )
+                continue
+            anim_curves.append(_key_atom_channel(
+                fn_node.findPlug(atom_channel.attr, False),
+                atom_channel,
+                _get_value_converter(channels.header, atom_channel.output),
+                unit
+            ))
+    return anim_curves
+
+
+class AttrSamples(object):
+    """
+    Class for attribute values sampled over frames, stored column by column
+    (one array of values per attribute) in internal units
+    """
+
+    def __init__(self, frames, attrs, columns):
+        """
+        Initialization
+
+        :param frames: array. sampled frames
+        :param attrs: list. attribute full names
+        :param columns: list. array of values per attribute
+        """
+        self.frames = frames
+        self.attrs = attrs
+        self.columns = columns
+
+    def save(self, path):
+        """
+        Save the samples to a compact binary file: header, attribute names
+        as json, then the frames and each column as little endian doubles
+
+        :param path: str. file path
+        """
+        names = json.dumps(self.attrs).encode('utf-8')
+        with open(path, 'wb') as f:
+            f.write(_SAMPLES_HEADER.pack(
+                SAMPLES_MAGIC,
+                SAMPLES_VERSION,
+                len(self.frames),
+                len(self.attrs),
+                len(names)
+            ))
+            f.write(names)
+            for data in [self.frames] + self.columns:
+                if sys.byteorder != 'little':
+                    data = array('d', data)
+                    data.byteswap()
+                data.tofile(f)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Load samples saved by save()
+
+        :param path: str. file path
+        :return: AttrSamples.
+        """
+        with open(path, 'rb') as f:
+            magic, version, frame_count, attr_count, size = \
+                _SAMPLES_HEADER.unpack(f.read(_SAMPLES_HEADER.size))
+            if magic != SAMPLES_MAGIC or version != SAMPLES_VERSION:
+                raise ValueError('{} is not an attribute sample file'.format(
+                    path))
+
+            attrs = json.loads(f.read(size).decode('utf-8'))
+            arrays = list()
+            for _ in range(attr_count + 1):
+                data = array('d')
+                data.fromfile(f, frame_count)
+                if sys.byteorder != 'little':
+                    data.byteswap()
+                arrays.append(data)
+        return cls(arrays[0], attrs, arrays[1:])
+
+
+def sample_attrs(attrs, start, end, step=1):
+    """
+    Sample attributes over a frame range without an export node,
+    all attributes are evaluated together in DG context once per frame
+
+    :param attrs: list. attribute full names
+    :param start: int. start frame
+    :param end: int. end frame
+    :param step: int. frame step between samples
+    :return: AttrSamples.
+    """
+    plugs = channel.get_plugs(list(OrderedDict.fromkeys(attrs)))
+    frames = array('d', range(start, end + 1, step))
+    unit = om.MTime.uiUnit()
+    columns = bake.sample_plugs(
+        [plugs[attr] for attr in attrs],
+        [om.MTime(frame, unit) for frame in frames]
+    )
+    return AttrSamples(frames, list(attrs), columns)
+
+
+def apply_samples(samples, mapping=None):
+    """
+    Key sampled attributes on targets, every mapped target is keyed from
+    the same samples so one file can drive many targets, keys are written
+    through bake.write_keys(). Not undoable
+
+    :param samples: AttrSamples. sampled attributes
+    :param mapping: dict. source attribute full name or node name:
+                    target attribute full name or node name, or a list of
+                    them, unmapped attributes are skipped, keys the
+                    source attributes themselves if not given
+    :return: list. anim curve names
+    """
+    targets = list()
+    columns = list()
+    for attr, column in zip(samples.attrs, samples.columns):
+        node, _, attr_name = attr.partition('.')
+        if mapping is None:
+            names = attr
+        else:
+            names = mapping.get(attr, mapping.get(node))
+        if names is None:
+            continue
+        if not isinstance(names, list):
+            names = [names]
+
+        for name in names:
+            if '.' not in name:
+                name = '{}.{}'.format(name, attr_name)
+            targets.append(name)
+            columns.append(column)
+
+    plugs = channel.get_plugs(list(OrderedDict.fromkeys(targets)))
+    unit = om.MTime.uiUnit()
+    return bake.write_keys(
+        [plugs[target] for target in targets],
+        [om.MTime(frame, unit) for frame in samples.frames],
+        columns
+    )
+
+
+def import_samples(fpath, mapping=None):
+    """
+    Load a sample file once and key it on all mapped targets. Not undoable
+
+    :param fpath: str. file path
+    :param mapping: dict. name mapping table, see apply_samples()
+    :return: list. anim curve names
+    """
+    return apply_samples(AttrSamples.load(fpath), mapping)
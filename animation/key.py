@@ -1,4 +1,10 @@
+from collections import OrderedDict
+
 import maya.cmds as cmds
+from maya.api import OpenMaya as om
+
+from . import bake
+from ..common import channel
 
 
 def bake_keys(nodes, start, end):
@@ -26,8 +32,6 @@ def bake_keys(nodes, start, end):
             bakeOnOverrideLayer=0,
             minimizeRotation=1
         )
-    except Exception:
-        raise Exception
     finally:
         cmds.refresh(suspend=0)
         cmds.evaluationManager(mode=eval_mode)
@@ -37,7 +41,8 @@ def copy_keys(source, destination, start, end):
     """
     Copy keyframes from one channel to another within a given range.
     if keyframes are not present, the start and end frames are set so values
-    are fixed
+    are fixed, boundary values are read in time context so the current time
+    doesn't change
 
     :param source: str. source attribute full name (e.g. 'cube1.tx')
     :param destination: str. destination/target attribute full name
@@ -45,8 +50,8 @@ def copy_keys(source, destination, start, end):
     :param start: int. start frame
     :param end: int. end frame
     """
-    src_node, src_attr = source.split('.')
-    dst_node, dst_attr = destination.split('.')
+    src_node, src_attr = source.split('.', 1)
+    dst_node, dst_attr = destination.split('.', 1)
 
     # copy keyframes between the range
     keys = cmds.copyKey(
@@ -59,18 +64,112 @@ def copy_keys(source, destination, start, end):
         cmds.pasteKey(dst_node, attribute=dst_attr, option="insert")
 
     # set keyframes at start and end just in case
-    cmds.currentTime(start)
-    cmds.setKeyframe(
-        dst_node,
-        attribute=dst_attr,
-        time=start,
-        value=cmds.getAttr(source)
-    )
+    for frame in (start, end):
+        cmds.setKeyframe(
+            dst_node,
+            attribute=dst_attr,
+            time=frame,
+            value=cmds.getAttr(source, time=frame)
+        )
 
-    cmds.currentTime(end)
-    cmds.setKeyframe(
-        dst_node,
-        attribute=dst_attr,
-        time=end,
-        value=cmds.getAttr(source)
-    )
+
+def _get_anim_curve(plug):
+    """
+    Get the anim curve driving a plug
+
+    :param plug: MPlug. animated plug
+    :return: MFnAnimCurve. None if the plug isn't driven by an anim curve
+    """
+    source = plug.source()
+    if source.isNull or not source.node().hasFn(om.MFn.kAnimCurve):
+        return None
+    return om.MFnAnimCurve(source.node())
+
+
+def _set_key(fn_curve, mtime, value):
+    """
+    Key a value, replacing the value of an existing key at the same time
+
+    :param fn_curve: MFnAnimCurve. anim curve
+    :param mtime: MTime. key time
+    :param value: float. key value in internal units
+    :return: int. key index
+    """
+    index = fn_curve.find(mtime)
+    if index is None:
+        return fn_curve.addKey(mtime, value)
+    fn_curve.setValue(index, value)
+    return index
+
+
+def copy_keys_batch(pairs, start, end):
+    """
+    Copy keyframes between many channel pairs within a given range through
+    MFnAnimCurve, destination keys in the range are replaced and the start
+    and end frames are keyed with values sampled in DG context,
+    the current time never changes. Not undoable, use copy_keys() per pair
+    when the copy has to be undone
+
+    :param pairs: list. (source, destination) attribute full names
+    :param start: int. start frame
+    :param end: int. end frame
+    :return: list. destination anim curve names
+    """
+    attributes = OrderedDict()
+    for source, destination in pairs:
+        attributes[source] = None
+        attributes[destination] = None
+    plugs = channel.get_plugs(list(attributes))
+
+    unit = om.MTime.uiUnit()
+    start_time = om.MTime(start, unit)
+    end_time = om.MTime(end, unit)
+    sources = list(OrderedDict.fromkeys(source for source, _ in pairs))
+    # one context switch per boundary frame for all source plugs
+    boundaries = dict(zip(
+        sources,
+        bake.sample_plugs(
+            [plugs[source] for source in sources],
+            [start_time, end_time]
+        )
+    ))
+
+    names = list()
+    for source, destination in pairs:
+        fn_curve = _get_anim_curve(plugs[destination])
+        if fn_curve is None:
+            fn_curve = om.MFnAnimCurve()
+            fn_curve.create(plugs[destination])
+        else:
+            for i in reversed(range(fn_curve.numKeys)):
+                if start_time <= fn_curve.input(i) <= end_time:
+                    fn_curve.remove(i)
+
+        src_curve = _get_anim_curve(plugs[source])
+        keys = list()
+        if src_curve is not None:
+            keys = [
+                i for i in range(src_curve.numKeys)
+                if start_time <= src_curve.input(i) <= end_time
+            ]
+        if keys:
+            fn_curve.addKeys(
+                [src_curve.input(i) for i in keys],
+                [src_curve.value(i) for i in keys],
+                keepExistingKeys=True
+            )
+            # tangents are copied key by key, addKeys only takes one type
+            for i in keys:
+                index = fn_curve.find(src_curve.input(i))
+                fn_curve.setInTangentType(index, src_curve.inTangentType(i))
+                fn_curve.setOutTangentType(index, src_curve.outTangentType(i))
+                for is_in in (True, False):
+                    angle, weight = src_curve.getTangentAngleWeight(i, is_in)
+                    fn_curve.setAngle(index, angle, is_in)
+                    fn_curve.setWeight(index, weight, is_in)
+
+        start_value, end_value = boundaries[source]
+        _set_key(fn_curve, start_time, start_value)
+        _set_key(fn_curve, end_time, end_value)
+        names.append(fn_curve.name())
+    return names
@@ -0,0 +1,213 @@
+"""
+Key reduction of baked animation
+
+Dense samples of many channels are reduced together as NumPy arrays. Each
+kept key gets a fixed tangent fitted to the slope of the samples at its
+frame, and keys are inserted where the reconstruction error is largest in
+each segment until every channel is within its tolerance. The reduced
+curve is written with one MFnAnimCurve.addKeys call and one setTangent pass
+per curve, and the reported error is measured on the curves actually
+written. Weighted curves are left untouched.
+
+Example:
+    report = reduction.reduce_anim_curves(cmds.ls(type='animCurveTA'), 1, 240)
+    # {'keys_before': 9600, 'keys_after': 812, 'ratio': 11.8, ...}
+"""
+
+import math
+
+import numpy as np
+
+from . import curves
+
+
+# anim curve type: default tolerance in internal units
+DEFAULT_TOLERANCES = {
+    'animCurveTA': math.radians(0.01),
+    'animCurveTL': 0.001,
+    'animCurveTU': 0.001,
+}
+
+
+def _take(array, indices):
+    return np.take_along_axis(array, indices, axis=1)
+
+
+def fit_slopes(values, frames):
+    """
+    Fit the tangent slope of every sample from its neighbouring samples,
+    a kept key uses the slope of the animation at its frame rather than
+    the chord between kept keys
+
+    :param values: np.ndarray. (channels, frames) sampled values
+    :param frames: np.ndarray. (frames,) sample frames
+    :return: np.ndarray. (channels, frames) slopes in value per frame
+    """
+    count = len(frames)
+    if count < 2:
+        return np.zeros(values.shape)
+    return np.gradient(values, frames, axis=1, edge_order=min(2, count - 1))
+
+
+def reconstruct(values, frames, keep, slopes):
+    """
+    Evaluate the curves made of the kept keys with fixed tangents
+
+    :param values: np.ndarray. (channels, frames) sampled values
+    :param frames: np.ndarray. (frames,) sample frames
+    :param keep: np.ndarray. (channels, frames) bool, kept keys
+    :param slopes: np.ndarray. (channels, frames) key slopes, see
+                   fit_slopes()
+    :return: np.ndarray. (channels, frames) reconstructed values
+    """
+    count = len(frames)
+    index = np.broadcast_to(np.arange(count), keep.shape)
+    start = np.maximum.accumulate(np.where(keep, index, -1), axis=1)
+    end = np.minimum.accumulate(
+        np.where(keep, index, count)[:, ::-1], axis=1)[:, ::-1]
+
+    t0, t1 = frames[start], frames[end]
+    dt = t1 - t0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        s = np.where(dt > 0, (frames - t0) / dt, 0.0)
+    s2 = s * s
+    s3 = s2 * s
+    return (
+        (2 * s3 - 3 * s2 + 1) * _take(values, start)
+        + (s3 - 2 * s2 + s) * dt * _take(slopes, start)
+        + (-2 * s3 + 3 * s2) * _take(values, end)
+        + (s3 - s2) * dt * _take(slopes, end)
+    )
+
+
+def reduce_samples(values, frames, tolerances, slopes=None):
+    """
+    Find the keys to keep so every channel is within its tolerance,
+    all channels are processed together
+
+    :param values: np.ndarray. (channels, frames) sampled values
+    :param frames: sequence. sample frames, sorted
+    :param tolerances: float or sequence. maximum error of each channel
+    :param slopes: np.ndarray. (channels, frames) key slopes, fitted from
+                   the samples if not given
+    :return: np.ndarray. (channels, frames) bool, kept keys
+    """
+    values = np.asarray(values, np.float64)
+    frames = np.asarray(frames, np.float64)
+    if slopes is None:
+        slopes = fit_slopes(values, frames)
+    channels, count = values.shape
+    tolerances = np.broadcast_to(
+        np.asarray(tolerances, np.float64), (channels,))[:, None]
+
+    keep = np.zeros(values.shape, np.bool_)
+    keep[:, 0] = keep[:, -1] = True
+    index = np.broadcast_to(np.arange(count), keep.shape)
+    rows = np.broadcast_to(np.arange(channels)[:, None], keep.shape)
+    while True:
+        error = np.abs(reconstruct(values, frames, keep, slopes) - values)
+        error[keep] = 0.0
+        over = error > tolerances
+        if not over.any():
+            return keep
+
+        # insert the worst frame of every segment over tolerance
+        segment = rows * count + np.maximum.accumulate(
+            np.where(keep, index, 0), axis=1)
+        segment, error, over = segment[over], error[over], over.nonzero()
+        order = np.lexsort((-error, segment))
+        worst = np.ones(len(order), np.bool_)
+        worst[1:] = segment[order][1:] != segment[order][:-1]
+        keep[over[0][order[worst]], over[1][order[worst]]] = True
+
+
+def reduce_anim_curves(anim_curves, start, end, tolerances=None):
+    """
+    Reduce the keys of anim curves within a frame range, e.g. right after a
+    bake, each curve is rewritten with one MFnAnimCurve.addKeys call and
+    its fitted tangents are set in one pass. Weighted curves are skipped,
+    the fitted tangents are hermite slopes and converting a curve to
+    unweighted tangents changes its keys outside of the range. Not undoable
+
+    :param anim_curves: list. time based anim curve names
+    :param start: int. start frame
+    :param end: int. end frame
+    :param tolerances: float or list. maximum error of each curve in
+                       internal units, defaults to DEFAULT_TOLERANCES
+    :return: dict. 'keys_before' and 'keys_after' in the range, 'ratio'
+             of key counts, 'max_error' and 'errors' of each reduced curve,
+             'skipped' weighted curve names
+    """
+    # only writing to the scene needs maya
+    from maya.api import OpenMaya as om
+
+    if tolerances is not None:
+        tolerances = np.broadcast_to(
+            np.asarray(tolerances, np.float64), (len(anim_curves),))
+
+    selection = om.MSelectionList()
+    for anim_curve in anim_curves:
+        selection.add(anim_curve)
+    names = list()
+    fn_curves = list()
+    indices = list()
+    skipped = list()
+    for i, anim_curve in enumerate(anim_curves):
+        fn_curve = om.MFnAnimCurve(selection.getDependNode(i))
+        if fn_curve.isWeighted:
+            skipped.append(anim_curve)
+            continue
+        names.append(anim_curve)
+        fn_curves.append(fn_curve)
+        indices.append(i)
+
+    if tolerances is None:
+        tolerances = [
+            DEFAULT_TOLERANCES.get(fn_curve.typeName, 0.001)
+            for fn_curve in fn_curves
+        ]
+    else:
+        tolerances = tolerances[indices]
+
+    frames = np.arange(start, end + 1, dtype=np.float64)
+    values = curves.CurveSet.from_anim_curves(names).evaluate(frames)
+    slopes = fit_slopes(values, frames)
+    keep = reduce_samples(values, frames, tolerances, slopes)
+
+    unit = om.MTime.uiUnit()
+    # tangent x is in seconds, one frame long
+    frame_seconds = om.MTime(1.0, unit).asUnits(om.MTime.kSeconds)
+    start_time = om.MTime(start, unit)
+    end_time = om.MTime(end, unit)
+    keys_before = 0
+    for fn_curve, curve_keep, curve_values, curve_slopes in zip(
+            fn_curves, keep, values, slopes):
+        for i in reversed(range(fn_curve.numKeys)):
+            if start_time <= fn_curve.input(i) <= end_time:
+                fn_curve.remove(i)
+                keys_before += 1
+        times = [om.MTime(frame, unit) for frame in frames[curve_keep]]
+        fn_curve.addKeys(
+            times,
+            curve_values[curve_keep],
+            om.MFnAnimCurve.kTangentFixed,
+            om.MFnAnimCurve.kTangentFixed,
+            True
+        )
+        for mtime, slope in zip(times, curve_slopes[curve_keep]):
+            key = fn_curve.find(mtime)
+            for is_in in (True, False):
+                fn_curve.setTangent(
+                    key, frame_seconds, float(slope), is_in, None, False)
+
+    reduced = curves.CurveSet.from_anim_curves(names)
+    errors = np.abs(reduced.evaluate(frames) - values).max(axis=1)
+    keys_after = int(keep.sum())
+    return {
+        'keys_before': keys_before,
+        'keys_after': keys_after,
+        'ratio': float(keys_before) / keys_after if keys_after else 0.0,
+        'max_error': float(errors.max()) if len(errors) else 0.0,
+        'errors': errors.tolist(),
+        'skipped': skipped,
+    }
@@ -0,0 +1,225 @@
+"""
+Frame range sharded parallel bake
+
+The frame range is split into shards baked in parallel by headless mayapy
+worker processes (see animation.shard_worker), each opening its own copy of
+the scene. Every shard starts sampling some pre-roll frames before the
+frames it keeps so simulations have settled, the values are streamed back
+as arrays, merged in frame order and keyed in the master session.
+
+Example:
+    shard.bake_sharded(['cape_jnt1', 'cape_jnt2'], 1001, 12000, preroll=50)
+    # without maya, using the stand-in worker
+    frames, samples = shard.sample_sharded(
+        job, executable=sys.executable, stand_in=1)
+"""
+
+import json
+import logging
+import multiprocessing
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+from array import array
+
+from . import shard_worker
+
+
+logger = logging.getLogger(__name__)
+
+WORKER_MODULE = shard_worker.__name__
+
+
+def get_mayapy():
+    """
+    Get the mayapy executable next to the running maya
+
+    :return: str. mayapy path
+    """
+    location = os.environ.get('MAYA_LOCATION', '')
+    name = 'mayapy.exe' if sys.platform == 'win32' else 'mayapy'
+    return os.path.join(location, 'bin', name)
+
+
+def split_frames(frames, shards, preroll=0):
+    """
+    Split frames into shards, each shard also samples pre-roll frames
+    before its first kept frame (clamped to the first frame)
+
+    :param frames: list. frames to bake, in order
+    :param shards: int. number of shards
+    :param preroll: int. number of extra samples before each shard
+    :return: list. (sample start, keep start, end) frames of each shard
+    """
+    shards = max(1, min(shards, len(frames)))
+    size, extra = divmod(len(frames), shards)
+    ranges = list()
+    start = 0
+    for i in range(shards):
+        end = start + size + (1 if i < extra else 0)
+        ranges.append((
+            frames[max(0, start - preroll)],
+            frames[start],
+            frames[end - 1]
+        ))
+        start = end
+    return ranges
+
+
+def _read_shard(process, rows):
+    """
+    Read the streamed rows of a worker process
+
+    :param process: subprocess.Popen. worker process
+    :param rows: list. filled with one array of plug values per frame
+    """
+    stream = process.stdout
+    plug_count, frame_count = shard_worker.HEADER.unpack(
+        stream.read(shard_worker.HEADER.size))
+    for _ in range(frame_count):
+        row = array('d')
+        row.fromfile(stream, plug_count)
+        if sys.byteorder != 'little':
+            row.byteswap()
+        rows.append(row)
+
+
+def sample_sharded(
+        job,
+        shards=None,
+        preroll=0,
+        executable=None,
+        stand_in=0):
+    """
+    Sample plugs over a frame range in parallel worker processes
+
+    :param job: dict. 'scene' file path, 'plugs' names, 'start' and 'end'
+                frames, 'step'
+    :param shards: int. number of worker processes, defaults to cpu count
+    :param preroll: int. number of extra samples before each shard
+    :param executable: str. python interpreter running the workers,
+                       defaults to mayapy
+    :param stand_in: bool. workers return stand-in values without maya
+    :return: tuple. (frames, array of values per plug)
+    """
+    frames = list(range(job['start'], job['end'] + 1, job.get('step', 1)))
+    if shards is None:
+        shards = multiprocessing.cpu_count()
+
+    command = [executable or get_mayapy(), '-m', WORKER_MODULE]
+    if stand_in:
+        command.append('--stand-in')
+    # the worker module is imported from the directory holding the package
+    env = dict(os.environ)
+    root = os.path.dirname(os.path.dirname(os.path.dirname(
+        os.path.abspath(__file__))))
+    env['PYTHONPATH'] = os.pathsep.join(
+        filter(None, [root, env.get('PYTHONPATH')]))
+
+    workers = list()
+    for sample_start, keep, end in split_frames(frames, shards, preroll):
+        shard_job = dict(job, start=sample_start, keep=keep, end=end)
+        shard_job.setdefault('step', 1)
+        process = subprocess.Popen(
+            command,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            env=env
+        )
+        process.stdin.write(json.dumps(shard_job).encode('utf-8'))
+        process.stdin.close()
+
+        rows = list()
+        reader = threading.Thread(target=_read_shard, args=(process, rows))
+        reader.start()
+        workers.append((process, reader, rows, keep))
+
+    merged = list()
+    for process, reader, rows, keep in workers:
+        reader.join()
+        if process.wait():
+            raise RuntimeError(
+                'bake worker for frames from {} failed with exit code '
+                '{}'.format(keep, process.returncode))
+        merged.extend(rows)
+    if len(merged) != len(frames):
+        raise RuntimeError('bake workers returned {} of {} frames'.format(
+            len(merged), len(frames)))
+
+    logger.info(
+        'sampled %s plugs over %s frames in %s shards',
+        len(job['plugs']),
+        len(frames),
+        len(workers)
+    )
+    samples = [array('d') for _ in job['plugs']]
+    for row in merged:
+        for values, value in zip(samples, row):
+            values.append(value)
+    return frames, samples
+
+
+def bake_sharded(
+        nodes,
+        start,
+        end,
+        attrs=None,
+        step=1,
+        shards=None,
+        preroll=0,
+        executable=None):
+    """
+    Bake animation of specified nodes in parallel mayapy processes,
+    workers step time sequentially so simulation driven rigs are supported
+
+    :param nodes: [str]. node names to bake
+    :param start: int. start frame
+    :param end: int. end frame
+    :param attrs: list. attribute names, see bake.get_bake_plugs()
+    :param step: int. frame step between samples
+    :param shards: int. number of worker processes, defaults to cpu count
+    :param preroll: int. number of extra samples before each shard,
+                    long enough for simulations to settle
+    :param executable: str. mayapy path, found from MAYA_LOCATION by default
+    :return: list. anim curve names
+    """
+    # maya is only needed in the master session, not to run the workers
+    import maya.cmds as cmds
+    from maya.api import OpenMaya as om
+
+    from . import bake
+    from ..common import channel
+
+    plugs = bake.get_bake_plugs(nodes, attrs)
+    handle, scene = tempfile.mkstemp(suffix='.mb')
+    os.close(handle)
+    try:
+        cmds.file(
+            scene,
+            exportAll=1,
+            preserveReferences=1,
+            type='mayaBinary',
+            force=1
+        )
+        frames, samples = sample_sharded(
+            {
+                'scene': scene,
+                # plug.name() only holds the short node name
+                'plugs': [channel._get_plug_name(plug) for plug in plugs],
+                'start': start,
+                'end': end,
+                'step': step,
+            },
+            shards,
+            preroll,
+            executable
+        )
+    finally:
+        os.remove(scene)
+
+    # workers sample plug.asDouble() in internal units like bake.sample_plugs()
+    unit = om.MTime.uiUnit()
+    times = [om.MTime(frame, unit) for frame in frames]
+    return bake.write_keys(plugs, times, samples)
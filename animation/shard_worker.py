@@ -0,0 +1,121 @@
+"""
+Worker process of the sharded bake, see animation.shard
+
+Reads a json job from stdin, opens the scene in a headless mayapy session,
+steps time sequentially from the shard sample start and streams the plug
+values of the kept frames to stdout, one row of doubles per frame
+
+Usage:
+    mayapy -m mayaUtil.animation.shard_worker < job.json
+    python -m mayaUtil.animation.shard_worker --stand-in < job.json
+"""
+
+import json
+import os
+import struct
+import sys
+from array import array
+
+
+# plug count, frame count
+HEADER = struct.Struct('<II')
+
+
+def stand_in_value(plug_index, frame):
+    """
+    Deterministic value of the stand-in worker, depends on the frame only
+    so a sharded stand-in bake matches a serial one
+
+    :param plug_index: int. index of the plug in the job
+    :param frame: int. frame number
+    :return: float. sampled value
+    """
+    return plug_index * 1000.0 + frame * 0.5
+
+
+def iter_stand_in_rows(job):
+    """
+    Sample the job without maya
+
+    :param job: dict. bake job
+    :return: generator. (frame, row of values)
+    """
+    for frame in range(job['start'], job['end'] + 1, job['step']):
+        yield frame, [
+            stand_in_value(i, frame) for i in range(len(job['plugs']))
+        ]
+
+
+def iter_maya_rows(job):
+    """
+    Sample the job in a headless maya session, time is stepped sequentially
+    so simulations evaluate like in a serial bake
+
+    :param job: dict. bake job
+    :return: generator. (frame, row of values)
+    """
+    import maya.standalone
+    maya.standalone.initialize()
+
+    import maya.cmds as cmds
+    from maya.api import OpenMaya as om
+
+    cmds.file(job['scene'], open=1, force=1)
+    # one selection list per plug, a shared one merges different names of
+    # the same plug and would shift the columns
+    plugs = list()
+    for name in job['plugs']:
+        selection = om.MSelectionList()
+        selection.add(name)
+        plugs.append(selection.getPlug(0))
+
+    for frame in range(job['start'], job['end'] + 1, job['step']):
+        cmds.currentTime(frame, update=1)
+        yield frame, [plug.asDouble() for plug in plugs]
+
+
+def run(job, rows, stream):
+    """
+    Stream the rows of the kept frames
+
+    :param job: dict. bake job with 'plugs', 'start', 'keep', 'end', 'step'
+    :param rows: generator. (frame, row of values)
+    :param stream: file. binary output stream
+    """
+    kept = len(range(job['keep'], job['end'] + 1, job['step']))
+    stream.write(HEADER.pack(len(job['plugs']), kept))
+    for frame, row in rows:
+        if frame < job['keep']:
+            continue
+        values = array('d', row)
+        if sys.byteorder != 'little':
+            values.byteswap()
+        values.tofile(stream)
+        stream.flush()
+
+
+def main(argv=None):
+    """
+    :param argv: list. command line arguments
+    :return: int. exit code
+    """
+    argv = sys.argv[1:] if argv is None else argv
+    job = json.load(sys.stdin)
+
+    # keep the real stdout for the values, anything maya prints goes to stderr
+    sys.stdout.flush()
+    stream = os.fdopen(os.dup(1), 'wb')
+    os.dup2(2, 1)
+
+    if '--stand-in' in argv:
+        rows = iter_stand_in_rows(job)
+    else:
+        rows = iter_maya_rows(job)
+
+    with stream:
+        run(job, rows, stream)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,329 @@
+"""
+Offline animCurve evaluator benchmark
+
+Times animation.curves.CurveSet.evaluate on synthetic curves. Run with
+mayapy and --maya to build the curves in a Maya session, read them back and
+compare against per-frame MFnAnimCurve.evaluate queries (time and maximum
+absolute error).
+
+With --atom the tangents computed by CurveSet.from_atom_channels are checked
+instead: against reference values maya evaluates exactly (linear, flat,
+step, fixed and spline through collinear keys), and with --maya against
+curves keyed with each tangent type in a Maya session.
+
+Usage (from the directory containing the package):
+    python -m mayaUtil.bench.curves --curves 2000 --frames 1000
+    mayapy -m mayaUtil.bench.curves --curves 500 --frames 500 --maya
+    python -m mayaUtil.bench.curves --atom
+    mayapy -m mayaUtil.bench.curves --curves 500 --atom --maya
+"""
+
+import argparse
+import importlib
+import math
+import random
+import sys
+import time
+
+_PACKAGE = __package__.rpartition('.')[0]
+
+atom = importlib.import_module('{}.animation.atom'.format(_PACKAGE))
+curves = importlib.import_module('{}.animation.curves'.format(_PACKAGE))
+
+# angle and weight of the fixed tangents of the references
+FIXED_TANGENT = (45.0, 1.0)
+
+# tangent type, output, keys as (time, value), checks as (frame, value)
+ATOM_REFERENCES = (
+    ('linear', None, [(1, 0.0), (11, 10.0), (21, 0.0)],
+     [(6, 5.0), (16, 5.0), (25, 0.0)]),
+    ('flat', None, [(1, 0.0), (11, 10.0), (21, 0.0)],
+     [(3.5, 1.5625), (6, 5.0), (18.5, 1.5625)]),
+    ('step', None, [(1, 0.0), (11, 10.0), (21, 0.0)],
+     [(10.5, 0.0), (11, 10.0), (20.5, 10.0)]),
+    ('spline', None, [(1, 0.0), (11, 10.0), (21, 20.0)],
+     [(4, 3.0), (16, 15.0)]),
+    # 45 degrees at film rate is a slope of 1 / 24 per frame
+    ('fixed', None, [(1, 0.0), (25, 0.0)],
+     [(7, 0.09375), (13, 0.0), (19, -0.09375)]),
+    ('linear', 'angular', [(1, 0.0), (11, 90.0)],
+     [(6, math.radians(45.0))]),
+)
+
+# tangent types maya computes from the key values
+COMPUTED_TANGENTS = ('auto', 'clamped', 'flat', 'linear', 'spline', 'step')
+
+
+def build_curves(count, frames, seed=0):
+    """
+    Build synthetic curves mixing weighted, step and infinity types
+
+    :param count: int. number of curves
+    :param frames: int. key range length in frames
+    :param seed: int. random seed
+    :return: list. Curve
+    """
+    rng = random.Random(seed)
+    infinity_types = sorted(curves.INFINITY_TYPES.values())
+    result = list()
+    for i in range(count):
+        key_count = rng.randint(2, 12)
+        times = sorted(rng.sample(range(frames), key_count))
+        tangents = [
+            (rng.uniform(1.0, 4.0), rng.uniform(-5.0, 5.0))
+            for _ in times
+        ]
+        out_types = [
+            curves.TANGENT_STEP if rng.random() < 0.05 else 0
+            for _ in times
+        ]
+        result.append(curves.Curve(
+            'curve{}'.format(i),
+            times,
+            [rng.uniform(-10.0, 10.0) for _ in times],
+            tangents,
+            tangents,
+            out_types,
+            rng.random() < 0.3,
+            rng.choice(infinity_types),
+            rng.choice(infinity_types)
+        ))
+    return result
+
+
+def create_maya_curves(synthetic):
+    """
+    Create the synthetic curves as animCurveTU nodes, tangents are left
+    to maya
+
+    :param synthetic: list. Curve
+    :return: list. anim curve names
+    """
+    from maya.api import OpenMaya as om
+
+    unit = om.MTime.uiUnit()
+    names = list()
+    for curve in synthetic:
+        fn_curve = om.MFnAnimCurve()
+        fn_curve.create(om.MFnAnimCurve.kAnimCurveTU)
+        fn_curve.addKeys(
+            [om.MTime(frame, unit) for frame in curve.times],
+            curve.values,
+            om.MFnAnimCurve.kTangentAuto,
+            om.MFnAnimCurve.kTangentAuto
+        )
+        fn_curve.setIsWeighted(curve.weighted)
+        for i, out_type in enumerate(curve.out_types):
+            if out_type == curves.TANGENT_STEP:
+                fn_curve.setOutTangentType(i, om.MFnAnimCurve.kTangentStep)
+        fn_curve.setPreInfinityType(curve.pre_infinity)
+        fn_curve.setPostInfinityType(curve.post_infinity)
+        names.append(fn_curve.name())
+    return names
+
+
+def evaluate_maya(names, frames):
+    """
+    Evaluate anim curves frame by frame through MFnAnimCurve
+
+    :param names: list. anim curve names
+    :param frames: list. frames
+    :return: list. list of values per curve
+    """
+    from maya.api import OpenMaya as om
+
+    unit = om.MTime.uiUnit()
+    times = [om.MTime(frame, unit) for frame in frames]
+    selection = om.MSelectionList()
+    for name in names:
+        selection.add(name)
+    result = list()
+    for i in range(len(names)):
+        fn_curve = om.MFnAnimCurve(selection.getDependNode(i))
+        result.append([fn_curve.evaluate(mtime) for mtime in times])
+    return result
+
+
+def build_atom_channel(name, tangent, keys, output=None):
+    """
+    Build an atom channel with the same tangent type on every key
+
+    :param name: str. node name
+    :param tangent: str. atom tangent type name
+    :param keys: list. (time, value) in atom units
+    :param output: str. atom output type
+    :return: atom.AtomChannel
+    """
+    atom_keys = atom.new_keys()
+    code = atom.TANGENT_TYPES.index(tangent)
+    angle, weight = FIXED_TANGENT if tangent == 'fixed' else (0.0, 0.0)
+    for frame, value in keys:
+        atom_keys.times.append(frame)
+        atom_keys.values.append(value)
+        for field in ('in_angles', 'out_angles'):
+            getattr(atom_keys, field).append(angle)
+        for field in ('in_weights', 'out_weights'):
+            getattr(atom_keys, field).append(weight)
+        for field in ('in_types', 'out_types'):
+            getattr(atom_keys, field).append(code)
+        for field in ('tan_locks', 'weight_locks', 'breakdowns'):
+            getattr(atom_keys, field).append(0)
+    return atom.AtomChannel(
+        name, 0, 0, 'attr', 'attr', [0, 0, 0], output, 0, 'constant',
+        'constant', atom_keys)
+
+
+def check_atom_references():
+    """
+    Evaluate the reference atom channels
+
+    :return: float. maximum absolute error
+    """
+    channels = [
+        build_atom_channel('ref{}'.format(i), tangent, keys, output)
+        for i, (tangent, output, keys, _) in enumerate(ATOM_REFERENCES)
+    ]
+    curve_set = curves.CurveSet.from_atom_channels(
+        channels, atom.DEFAULT_HEADER)
+    error = 0.0
+    for i, (_, _, _, checks) in enumerate(ATOM_REFERENCES):
+        frames = [frame for frame, _ in checks]
+        row = curve_set.evaluate(frames)[i]
+        error = max(error, max(
+            abs(value - expected)
+            for value, (_, expected) in zip(row, checks)
+        ))
+    return error
+
+
+def create_maya_atom_curves(count, frames, seed=0):
+    """
+    Key animCurveTU nodes with the tangent types of COMPUTED_TANGENTS and
+    read them back as atom channels without their tangents
+
+    :param count: int. number of curves
+    :param frames: int. key range length in frames
+    :param seed: int. random seed
+    :return: tuple. (anim curve names, atom channels, atom header)
+    """
+    import maya.cmds as cmds
+    from maya.api import OpenMaya as om
+
+    unit = om.MTime.uiUnit()
+    rng = random.Random(seed)
+    names = list()
+    channels = list()
+    for i in range(count):
+        tangent = COMPUTED_TANGENTS[i % len(COMPUTED_TANGENTS)]
+        times = sorted(rng.sample(range(frames), rng.randint(2, 12)))
+        keys = [(frame, rng.uniform(-10.0, 10.0)) for frame in times]
+        # repeated values exercise the clamped and auto flattening
+        if len(keys) > 3 and rng.random() < 0.3:
+            keys[2] = (keys[2][0], keys[1][1])
+
+        fn_curve = om.MFnAnimCurve()
+        fn_curve.create(om.MFnAnimCurve.kAnimCurveTU)
+        fn_curve.addKeys(
+            [om.MTime(frame, unit) for frame, _ in keys],
+            [value for _, value in keys],
+            curves.TANGENT_TYPES[tangent],
+            curves.TANGENT_TYPES[tangent]
+        )
+        names.append(fn_curve.name())
+        channels.append(build_atom_channel(fn_curve.name(), tangent, keys))
+
+    header = dict(atom.DEFAULT_HEADER)
+    header['timeUnit'] = cmds.currentUnit(query=1, time=1)
+    return names, channels, header
+
+
+def main(argv=None):
+    """
+    :param argv: list. command line arguments
+    :return: int. exit code, 1 if the maya comparison exceeds the tolerance
+    """
+    parser = argparse.ArgumentParser(description='animCurve evaluator bench')
+    parser.add_argument('--curves', type=int, default=2000)
+    parser.add_argument('--frames', type=int, default=1000)
+    parser.add_argument('--tolerance', type=float, default=1e-4)
+    parser.add_argument(
+        '--maya', action='store_true', help='compare against maya')
+    parser.add_argument(
+        '--atom', action='store_true', help='check atom tangents')
+    args = parser.parse_args(argv)
+
+    if args.atom:
+        return check_atom(args)
+
+    synthetic = build_curves(args.curves, args.frames)
+    # evaluate past both ends to cover pre and post infinity
+    frames = list(range(-args.frames // 2, args.frames * 3 // 2))
+
+    if not args.maya:
+        curve_set = curves.CurveSet(synthetic)
+        start = time.time()
+        curve_set.evaluate(frames)
+        print('numpy: {} curves x {} frames in {:.1f} ms'.format(
+            args.curves, len(frames), (time.time() - start) * 1000))
+        return 0
+
+    import maya.standalone
+    maya.standalone.initialize()
+
+    names = create_maya_curves(synthetic)
+    curve_set = curves.CurveSet.from_anim_curves(names)
+
+    start = time.time()
+    values = curve_set.evaluate(frames)
+    numpy_time = time.time() - start
+
+    start = time.time()
+    expected = evaluate_maya(names, frames)
+    maya_time = time.time() - start
+
+    error = max(
+        abs(value - expected_value)
+        for row, expected_row in zip(values.tolist(), expected)
+        for value, expected_value in zip(row, expected_row)
+    )
+    print('numpy: {:.1f} ms, maya per frame: {:.1f} ms, '
+          'max error: {:g}'.format(numpy_time * 1000, maya_time * 1000, error))
+    return 0 if error <= args.tolerance else 1
+
+
+def check_atom(args):
+    """
+    :param args: argparse.Namespace. parsed command line arguments
+    :return: int. exit code, 1 if a check exceeds the tolerance
+    """
+    error = check_atom_references()
+    print('atom references: max error: {:g}'.format(error))
+    if not args.maya:
+        return 0 if error <= args.tolerance else 1
+
+    import maya.standalone
+    maya.standalone.initialize()
+
+    names, channels, header = create_maya_atom_curves(
+        args.curves, args.frames)
+    frames = list(range(-args.frames // 2, args.frames * 3 // 2))
+    values = curves.CurveSet.from_atom_channels(
+        channels, header).evaluate(frames)
+    expected = evaluate_maya(names, frames)
+
+    # tangent type: maximum absolute error
+    errors = dict((tangent, 0.0) for tangent in COMPUTED_TANGENTS)
+    for i, (row, expected_row) in enumerate(zip(values.tolist(), expected)):
+        tangent = COMPUTED_TANGENTS[i % len(COMPUTED_TANGENTS)]
+        errors[tangent] = max([errors[tangent]] + [
+            abs(value - expected_value)
+            for value, expected_value in zip(row, expected_row)
+        ])
+    for tangent in COMPUTED_TANGENTS:
+        print('{}: max error against maya: {:g}'.format(
+            tangent, errors[tangent]))
+    return 0 if max([error] + list(errors.values())) <= args.tolerance else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,279 @@
+"""
+Command-budget benchmark suite
+
+Runs library functions against synthetic stand-in scenes and records the
+number of maya.cmds calls and the wall time of each function. A function
+issuing more commands than its recorded budget fails the suite, wall time
+is only reported. Functions that need the Maya API are reported as skipped.
+
+Usage (from the directory containing the package):
+    python -m mayaUtil.bench.run
+    python -m mayaUtil.bench.run --sizes 1000 10000 100000
+    python -m mayaUtil.bench.run --update  # record the current call counts
+"""
+
+import argparse
+import importlib
+import json
+import os
+import sys
+import time
+
+from . import scene
+
+
+BUDGET_FILE = os.path.join(os.path.dirname(__file__), 'budgets.json')
+SIZES = (1000, 10000)
+
+_PACKAGE = __package__.rpartition('.')[0]
+
+
+def _import(module):
+    return importlib.import_module('{}.{}'.format(_PACKAGE, module))
+
+
+def _get_nodes(sc, typ, count=None):
+    nodes = [
+        sc.long_name(node) for node in sc.nodes.values()
+        if scene.is_type_of(node.type, typ)
+    ]
+    return nodes[:count] if count else nodes
+
+
+def _case_get_top_nodes(sc, size):
+    return lambda m: m['hierarchy'].get_top_nodes('transform')
+
+
+def _case_get_root_node(sc, size):
+    joints = [node for node in sc.nodes.values() if node.type == 'joint']
+    leaf = sc.long_name(max(joints[:100], key=lambda node: node.depth))
+    return lambda m: m['hierarchy'].get_root_node(leaf, 'joint')
+
+
+def _case_batch_parent(sc, size):
+    nodes = [
+        sc.long_name(sc.resolve(shape).parent)
+        for shape in _get_nodes(sc, 'mesh', size // 20)
+    ]
+    group = sc.display_name(sc.add_node('transform', 'bench_grp'))
+    return lambda m: m['hierarchy'].batch_parent(nodes, group)
+
+
+def _case_hierarchical_parent(sc, size):
+    nodes = [
+        sc.display_name(sc.add_node('transform', 'chain{}'.format(i)))
+        for i in range(size // 50)
+    ]
+    return lambda m: m['hierarchy'].hierarchical_parent(nodes)
+
+
+def _case_check_duplicates(sc, size):
+    return lambda m: m['naming'].check_duplicates()
+
+
+def _case_are_names_unique(sc, size):
+    nodes = _get_nodes(sc, 'transform')
+    return lambda m: m['naming'].are_names_unique(nodes)
+
+
+def _case_remove_namespaces(sc, size):
+    names = [sc.display_name(node) for node in sc.nodes.values()]
+    nodes = [name for name in names if ':' in name and '|' not in name]
+    nodes = nodes[:size // 10]
+    return lambda m: m['naming'].remove_namespaces(nodes)
+
+
+def _case_get_attrs_channel(sc, size):
+    nodes = _get_nodes(sc, 'joint', size // 100)
+    return lambda m: [m['channel'].get_attrs_channel(node) for node in nodes]
+
+
+def _case_reset_attrs(sc, size):
+    nodes = _get_nodes(sc, 'joint', min(300, size // 10))
+    sc.selection = [sc.resolve(node) for node in nodes]
+    return lambda m: m['channel'].reset_attrs()
+
+
+def _case_validate_connection(sc, size):
+    attrs = [
+        '{}.tx'.format(node) for node in _get_nodes(sc, 'joint', size // 100)
+    ]
+    return lambda m: [m['channel'].validate_connection(attr) for attr in attrs]
+
+
+def _case_copy_keys(sc, size):
+    nodes = _get_nodes(sc, 'joint', size // 100)
+    for node in nodes:
+        attr = sc.resolve(node).get_attr('tx')
+        attr.keys = dict((float(frame), frame * 0.5) for frame in range(50))
+    pairs = [
+        ('{}.tx'.format(src), '{}.ty'.format(dst))
+        for src, dst in zip(nodes, reversed(nodes))
+    ]
+    return lambda m: [
+        m['animation.key'].copy_keys(src, dst, 0, 49) for src, dst in pairs
+    ]
+
+
+def _case_get_ghosting_node(sc, size):
+    return lambda m: m['qc.ghosting'].get_ghosting_node()
+
+
+def _case_unknown_node_fix_selected(sc, size):
+    nodes = _get_nodes(sc, 'unknown')
+    return lambda m: [m['qc.unknownNode'].fix_selected(node) for node in nodes]
+
+
+def _case_unknown_plugin_fix_all(sc, size):
+    return lambda m: m['qc.unknownPlugin'].fix_all(
+        m['qc.unknownPlugin'].inspect())
+
+
+# case name: setup function building the call from the scene and size
+CASES = [
+    ('hierarchy.get_top_nodes', _case_get_top_nodes),
+    ('hierarchy.get_root_node', _case_get_root_node),
+    ('hierarchy.batch_parent', _case_batch_parent),
+    ('hierarchy.hierarchical_parent', _case_hierarchical_parent),
+    ('naming.check_duplicates', _case_check_duplicates),
+    ('naming.are_names_unique', _case_are_names_unique),
+    ('naming.remove_namespaces', _case_remove_namespaces),
+    ('channel.get_attrs_channel', _case_get_attrs_channel),
+    ('channel.reset_attrs', _case_reset_attrs),
+    ('channel.validate_connection', _case_validate_connection),
+    ('animation.key.copy_keys', _case_copy_keys),
+    ('qc.ghosting.get_ghosting_node', _case_get_ghosting_node),
+    ('qc.unknownNode.fix_selected', _case_unknown_node_fix_selected),
+    ('qc.unknownPlugin.fix_all', _case_unknown_plugin_fix_all),
+]
+
+# module: function clearing its session cache, called before each case
+CACHES = (
+    ('common.schema', 'clear'),
+)
+
+MODULES = (
+    'hierarchy',
+    'naming',
+    'channel',
+    'animation.key',
+    'qc.ghosting',
+    'qc.unknownNode',
+    'qc.unknownPlugin',
+)
+
+
+def run_case(name, setup, size):
+    """
+    Run a single benchmark case on a fresh synthetic scene
+
+    :param name: str. case name
+    :param setup: function. build the call from the scene and size,
+                  the call takes a dict of the benchmarked modules
+    :param size: int. approximate number of DAG nodes in the scene
+    :return: tuple. (command calls or None if skipped, seconds, error)
+    """
+    modules = dict()
+    for module in MODULES:
+        path = module if '.' in module else 'common.{}'.format(module)
+        modules[module] = _import(path)
+
+    for module, func in CACHES:
+        getattr(_import(module), func)()
+
+    sc = scene.build_scene(size)
+    call = setup(sc, size)
+    scene.reset_calls()
+
+    start = time.time()
+    try:
+        call(modules)
+    except scene.ApiUnavailableError:
+        return None, time.time() - start, None
+    except Exception as e:
+        return scene.get_call_count(), time.time() - start, e
+    return scene.get_call_count(), time.time() - start, None
+
+
+def load_budgets():
+    """
+    :return: dict. case name: {size: maximum command calls}
+    """
+    if not os.path.exists(BUDGET_FILE):
+        return dict()
+    with open(BUDGET_FILE) as f:
+        return json.load(f)
+
+
+def save_budgets(budgets):
+    """
+    :param budgets: dict. case name: {size: maximum command calls}
+    """
+    with open(BUDGET_FILE, 'w') as f:
+        json.dump(budgets, f, indent=4, sort_keys=True)
+        f.write('\n')
+
+
+def main(argv=None):
+    """
+    Run all benchmark cases
+
+    :param argv: list. command line arguments
+    :return: int. exit code, 1 if any case errors or exceeds its budget
+    """
+    parser = argparse.ArgumentParser(description='Command-budget benchmark')
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES)
+    parser.add_argument('--cases', nargs='+', help='only run these cases')
+    parser.add_argument(
+        '--update', action='store_true', help='record current call counts')
+    args = parser.parse_args(argv)
+
+    scene.install()
+    budgets = load_budgets()
+    failed = list()
+
+    print('{:<36} {:>8} {:>8} {:>8} {:>10}  {}'.format(
+        'case', 'size', 'calls', 'budget', 'time (ms)', 'status'))
+    for name, setup in CASES:
+        if args.cases and name not in args.cases:
+            continue
+        for size in args.sizes:
+            calls, seconds, error = run_case(name, setup, size)
+            budget = budgets.get(name, dict()).get(str(size))
+
+            if error is not None:
+                status = 'ERROR {}: {}'.format(type(error).__name__, error)
+                failed.append((name, size))
+            elif calls is None:
+                status = 'skipped (api)'
+            elif args.update:
+                budgets.setdefault(name, dict())[str(size)] = calls
+                status = 'recorded'
+            elif budget is None:
+                status = 'no budget'
+            elif calls > budget:
+                status = 'FAIL'
+                failed.append((name, size))
+            else:
+                status = 'ok'
+
+            print('{:<36} {:>8} {:>8} {:>8} {:>10.1f}  {}'.format(
+                name,
+                size,
+                '-' if calls is None else calls,
+                '-' if budget is None else budget,
+                seconds * 1000,
+                status
+            ))
+
+    if args.update:
+        save_budgets(budgets)
+    if failed:
+        print('failed: {}'.format(
+            ', '.join('{} ({})'.format(*case) for case in failed)))
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
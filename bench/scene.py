@@ -0,0 +1,1067 @@
+"""
+In-memory stand-in for the maya.cmds subset used by this package
+
+The simulated scene holds nodes, the DAG hierarchy, attributes, connections,
+namespaces and simple keyframes; every command call is counted so the
+benchmark suite can track how many commands a function issues.
+The OpenMaya module is only a placeholder so modules can be imported,
+using any of its classes raises ApiUnavailableError
+
+Example:
+    scene.install()
+    import maya.cmds as cmds
+    cmds.createNode('transform', name='grp')
+    scene.get_call_count()
+"""
+
+import fnmatch
+import sys
+import types
+from collections import OrderedDict
+
+
+# node type: parent node type
+NODE_TYPES = {
+    'dependNode': None,
+    'dagNode': 'dependNode',
+    'transform': 'dagNode',
+    'joint': 'transform',
+    'shape': 'dagNode',
+    'mesh': 'shape',
+    'nurbsCurve': 'shape',
+    'locator': 'shape',
+    'network': 'dependNode',
+    'unknown': 'dependNode',
+    'expression': 'dependNode',
+    'unitConversion': 'dependNode',
+    'multDoubleLinear': 'dependNode',
+    'multiplyDivide': 'dependNode',
+    'blendShape': 'dependNode',
+    'skinCluster': 'dependNode',
+    'animCurve': 'dependNode',
+    'animCurveTL': 'animCurve',
+    'animCurveTA': 'animCurve',
+    'animCurveTU': 'animCurve',
+    'animCurveUL': 'animCurve',
+    'animCurveUA': 'animCurve',
+    'animCurveUU': 'animCurve',
+}
+
+# node type: [(long name, short name, default, keyable)]
+NODE_ATTRS = {
+    'dependNode': [
+        ('message', 'msg', None, 0),
+        ('caching', 'cch', 0, 0),
+        ('nodeState', 'nds', 0, 0),
+    ],
+    'dagNode': [
+        ('visibility', 'v', 1, 1),
+        ('ghosting', 'gh', 0, 0),
+        ('ghostingControl', 'gac', 0, 0),
+        ('overrideEnabled', 'ove', 0, 0),
+    ],
+    'transform': [
+        ('translateX', 'tx', 0.0, 1),
+        ('translateY', 'ty', 0.0, 1),
+        ('translateZ', 'tz', 0.0, 1),
+        ('rotateX', 'rx', 0.0, 1),
+        ('rotateY', 'ry', 0.0, 1),
+        ('rotateZ', 'rz', 0.0, 1),
+        ('scaleX', 'sx', 1.0, 1),
+        ('scaleY', 'sy', 1.0, 1),
+        ('scaleZ', 'sz', 1.0, 1),
+    ],
+    'joint': [
+        ('drawStyle', 'ds', 0, 0),
+        ('jointOrientX', 'jox', 0.0, 0),
+        ('jointOrientY', 'joy', 0.0, 0),
+        ('jointOrientZ', 'joz', 0.0, 0),
+    ],
+    'shape': [
+        ('intermediateObject', 'io', 0, 0),
+    ],
+    'animCurve': [
+        ('input', 'i', 0.0, 0),
+        ('output', 'o', 0.0, 0),
+    ],
+    'unitConversion': [
+        ('input', 'i', 0.0, 0),
+        ('output', 'o', 0.0, 0),
+        ('conversionFactor', 'cf', 1.0, 0),
+    ],
+    'multDoubleLinear': [
+        ('input1', 'i1', 0.0, 1),
+        ('input2', 'i2', 1.0, 1),
+        ('output', 'o', 0.0, 0),
+    ],
+}
+
+_CALLS = dict()
+_SCENE = None
+
+
+class ApiUnavailableError(RuntimeError):
+    """
+    Raised when code running on the stand-in scene uses the Maya API
+    """
+
+
+class Attr(object):
+    """
+    Class for a simulated node attribute
+    """
+
+    __slots__ = ('long', 'short', 'default', 'value', 'keyable', 'locked',
+                 'channel_box', 'dynamic', 'keys')
+
+    def __init__(self, long, short, default, keyable, dynamic=0):
+        self.long = long
+        self.short = short
+        self.default = default
+        self.value = default
+        self.keyable = keyable
+        self.locked = 0
+        self.channel_box = 0
+        self.dynamic = dynamic
+        self.keys = None
+
+
+class Node(object):
+    """
+    Class for a simulated scene node
+    """
+
+    __slots__ = ('name', 'type', 'parent', 'children', 'attrs', 'locked',
+                 'is_dag', 'ghost')
+
+    def __init__(self, name, typ):
+        self.name = name
+        self.type = typ
+        self.parent = None
+        self.children = list()
+        self.attrs = OrderedDict()
+        self.locked = 0
+        self.is_dag = is_type_of(typ, 'dagNode')
+        self.ghost = 0
+
+        chain = list()
+        current = typ
+        while current:
+            chain.append(current)
+            current = NODE_TYPES.get(current)
+        for node_type in reversed(chain):
+            for long, short, default, keyable in NODE_ATTRS.get(node_type, ()):
+                self.attrs[long] = Attr(long, short, default, keyable)
+
+    def get_attr(self, name):
+        """
+        Find an attribute by long or short name
+
+        :param name: str. attribute name
+        :return: Attr. None if not found
+        """
+        attr = self.attrs.get(name)
+        if attr is None:
+            for candidate in self.attrs.values():
+                if candidate.short == name:
+                    return candidate
+        return attr
+
+    @property
+    def depth(self):
+        """
+        :return: int. number of ancestors
+        """
+        depth = 0
+        node = self.parent
+        while node:
+            depth += 1
+            node = node.parent
+        return depth
+
+
+def is_type_of(typ, base):
+    """
+    Check if a node type inherits from a base type
+
+    :param typ: str. node type
+    :param base: str. base node type
+    :return: bool.
+    """
+    while typ:
+        if typ == base:
+            return True
+        typ = NODE_TYPES.get(typ)
+    return False
+
+
+def _as_list(value):
+    if value is None:
+        return list()
+    if isinstance(value, (list, tuple)):
+        result = list()
+        for item in value:
+            result.extend(_as_list(item))
+        return result
+    return [value]
+
+
+class Scene(object):
+    """
+    Class for the simulated scene and the maya.cmds subset running on it
+    """
+
+    def __init__(self):
+        """
+        Initialization
+        """
+        self.nodes = OrderedDict()
+        self.by_short = dict()
+        self.connections = OrderedDict()
+        self.namespaces = set()
+        self.selection = list()
+        self.time = 1.0
+        self.clipboard = None
+        self.unknown_plugins = list()
+
+    # -- scene helpers
+
+    def add_node(self, typ, name=None, parent=None):
+        """
+        Create a node without counting a command call
+
+        :param typ: str. node type
+        :param name: str. node short name
+        :param parent: Node. DAG parent
+        :return: Node.
+        """
+        if typ not in NODE_TYPES:
+            raise RuntimeError('Unknown object type: {}'.format(typ))
+        if not name:
+            name = self._next_name('{}#'.format(typ))
+        elif '#' in name:
+            name = self._next_name(name)
+
+        node = Node(name, typ)
+        self.nodes[id(node)] = node
+        self.by_short.setdefault(name, list()).append(node)
+        namespace = name.rpartition(':')[0]
+        while namespace:
+            self.namespaces.add(namespace)
+            namespace = namespace.rpartition(':')[0]
+        if parent is not None:
+            self._set_parent(node, parent)
+        return node
+
+    def long_name(self, node):
+        """
+        :return: str. long (full path) name of the node
+        """
+        if not node.is_dag:
+            return node.name
+        names = list()
+        while node:
+            names.append(node.name)
+            node = node.parent
+        return '|' + '|'.join(reversed(names))
+
+    def display_name(self, node):
+        """
+        :return: str. short name if unique, otherwise the long name
+        """
+        if len(self.by_short.get(node.name, ())) > 1:
+            return self.long_name(node)
+        return node.name
+
+    def find(self, name):
+        """
+        Find all nodes matching a name, pattern or path
+
+        :param name: str. node name
+        :return: list. matching nodes
+        """
+        if '*' in name or '?' in name:
+            return [
+                node for node in self.nodes.values()
+                if fnmatch.fnmatchcase(node.name, name)
+            ]
+        if '|' not in name:
+            return list(self.by_short.get(name, ()))
+
+        parts = [part for part in name.split('|') if part]
+        matches = list()
+        for node in self.by_short.get(parts[-1], ()):
+            current = node
+            for part in reversed(parts):
+                if current is None or current.name != part:
+                    break
+                current = current.parent
+            else:
+                if not name.startswith('|') or current is None:
+                    matches.append(node)
+        return matches
+
+    def resolve(self, name):
+        """
+        Find exactly one node
+
+        :param name: str. node name
+        :return: Node.
+        """
+        matches = self.find(name)
+        if not matches:
+            raise ValueError('No object matches name: {}'.format(name))
+        if len(matches) > 1:
+            raise ValueError(
+                'More than one object matches name: {}'.format(name))
+        return matches[0]
+
+    def resolve_plug(self, plug):
+        """
+        Find the node and attribute of a plug
+
+        :param plug: str. 'node.attribute'
+        :return: tuple. Node and Attr
+        """
+        node_name, _, attr_name = plug.partition('.')
+        node = self.resolve(node_name)
+        attr = node.get_attr(attr_name)
+        if attr is None:
+            raise ValueError('No object matches name: {}'.format(plug))
+        return node, attr
+
+    def plug_name(self, node, attr):
+        return '{}.{}'.format(self.display_name(node), attr.long)
+
+    def get_source(self, node, attr):
+        """
+        :return: tuple. (Node, Attr) connected into the plug, None if none
+        """
+        return self.connections.get((id(node), attr.long))
+
+    def iter_descendants(self, node):
+        stack = list(reversed(node.children))
+        while stack:
+            child = stack.pop()
+            yield child
+            stack.extend(reversed(child.children))
+
+    def _next_name(self, pattern):
+        prefix, _, suffix = pattern.partition('#')
+        number = 1
+        while '{}{}{}'.format(prefix, number, suffix) in self.by_short:
+            number += 1
+        return '{}{}{}'.format(prefix, number, suffix)
+
+    def _set_parent(self, node, parent):
+        if node.parent is not None:
+            node.parent.children.remove(node)
+        node.parent = parent
+        if parent is not None:
+            parent.children.append(node)
+
+    def _rename(self, node, name):
+        self.by_short[node.name].remove(node)
+        if not self.by_short[node.name]:
+            del self.by_short[node.name]
+        node.name = name
+        self.by_short.setdefault(name, list()).append(node)
+
+    def _remove(self, node):
+        for child in list(node.children):
+            self._remove(child)
+        if node.parent is not None:
+            node.parent.children.remove(node)
+        self.by_short[node.name].remove(node)
+        if not self.by_short[node.name]:
+            del self.by_short[node.name]
+        del self.nodes[id(node)]
+        for key, source in list(self.connections.items()):
+            if key[0] == id(node) or source[0] is node:
+                del self.connections[key]
+        if node in self.selection:
+            self.selection.remove(node)
+
+    # -- maya.cmds subset
+
+    def createNode(self, typ, name=None, n=None, parent=None, p=None,
+                   skipSelect=0, ss=0):
+        parent = parent or p
+        node = self.add_node(
+            typ,
+            name or n,
+            self.resolve(parent) if parent else None
+        )
+        return self.display_name(node)
+
+    def group(self, *args, **kwargs):
+        node = self.add_node('transform', kwargs.get('name') or 'group#')
+        return self.display_name(node)
+
+    def ls(self, *args, **kwargs):
+        names = _as_list(args)
+        if kwargs.get('selection') or kwargs.get('sl'):
+            nodes = list(self.selection)
+        elif names:
+            nodes = list()
+            for name in names:
+                nodes.extend(self.find(name))
+        else:
+            nodes = list(self.nodes.values())
+
+        if kwargs.get('assemblies'):
+            nodes = [
+                node for node in nodes
+                if node.is_dag and node.parent is None
+            ]
+        typ = kwargs.get('type')
+        if typ:
+            types_ = _as_list(typ)
+            nodes = [
+                node for node in nodes
+                if any(is_type_of(node.type, t) for t in types_)
+            ]
+        if kwargs.get('shapes'):
+            nodes = [node for node in nodes if is_type_of(node.type, 'shape')]
+        if kwargs.get('ghost'):
+            nodes = [node for node in nodes if node.ghost]
+        if kwargs.get('ro') or kwargs.get('readOnly'):
+            return list()
+
+        if kwargs.get('long') or kwargs.get('l'):
+            return [self.long_name(node) for node in nodes]
+        return [self.display_name(node) for node in nodes]
+
+    def listRelatives(self, *args, **kwargs):
+        nodes = [self.resolve(name) for name in _as_list(args)]
+        result = list()
+        for node in nodes:
+            if kwargs.get('parent') or kwargs.get('p'):
+                related = [node.parent] if node.parent else list()
+            elif kwargs.get('allDescendents') or kwargs.get('ad'):
+                related = list(self.iter_descendants(node))
+                related.reverse()
+            else:
+                related = list(node.children)
+            if kwargs.get('shapes') or kwargs.get('s'):
+                related = [n for n in related if is_type_of(n.type, 'shape')]
+            typ = kwargs.get('type')
+            if typ:
+                related = [
+                    n for n in related
+                    if any(is_type_of(n.type, t) for t in _as_list(typ))
+                ]
+            result.extend(related)
+
+        if not result:
+            return None
+        if kwargs.get('fullPath') or kwargs.get('f'):
+            return [self.long_name(node) for node in result]
+        return [self.display_name(node) for node in result]
+
+    def objectType(self, name, isType=None):
+        node = self.resolve(name)
+        if isType:
+            return node.type == isType
+        return node.type
+
+    def nodeType(self, name, derived=0, isTypeName=0, inherited=0):
+        if isTypeName:
+            if derived:
+                return [t for t in NODE_TYPES if is_type_of(t, name)]
+            chain = list()
+            while name:
+                chain.insert(0, name)
+                name = NODE_TYPES.get(name)
+            return chain
+        node = self.resolve(name)
+        if inherited:
+            return self.nodeType(node.type, isTypeName=1)
+        return node.type
+
+    def parent(self, *args, **kwargs):
+        names = _as_list(args)
+        if kwargs.get('world') or kwargs.get('w'):
+            parent = None
+        else:
+            parent = self.resolve(names.pop())
+        nodes = [self.resolve(name) for name in names]
+        for node in nodes:
+            if node.parent is parent:
+                raise RuntimeError(
+                    '{} is already a child of {}'.format(
+                        node.name, parent.name if parent else 'world'))
+            self._set_parent(node, parent)
+        return [self.display_name(node) for node in nodes]
+
+    def rename(self, old, new, **kwargs):
+        node = self.resolve(old)
+        if '#' in new:
+            new = self._next_name(new)
+        self._rename(node, new)
+        return self.display_name(node)
+
+    def delete(self, *args, **kwargs):
+        names = _as_list(args)
+        if kwargs.get('icn') or kwargs.get('inputConnectionsAndNodes'):
+            for name in names:
+                node, attr = self.resolve_plug(name)
+                source = self.connections.pop((id(node), attr.long), None)
+                if source and is_type_of(source[0].type, 'animCurve'):
+                    self._remove(source[0])
+            return
+        if kwargs.get('constructionHistory') or kwargs.get('ch'):
+            return
+        nodes = [self.resolve(name) for name in names]
+        for node in nodes:
+            if id(node) in self.nodes:
+                self._remove(node)
+
+    def select(self, *args, **kwargs):
+        nodes = [self.resolve(name) for name in _as_list(args)]
+        if kwargs.get('clear') or kwargs.get('cl'):
+            self.selection = list()
+        elif kwargs.get('add'):
+            self.selection.extend(nodes)
+        else:
+            self.selection = nodes
+
+    def getAttr(self, plug, lock=0, keyable=0, channelBox=0, time=None,
+                **kwargs):
+        node, attr = self.resolve_plug(plug)
+        if lock:
+            return bool(attr.locked)
+        if keyable:
+            return bool(attr.keyable)
+        if channelBox:
+            return bool(attr.channel_box)
+        if time is not None and attr.keys:
+            return self._evaluate_keys(attr.keys, time)
+        if attr.keys:
+            return self._evaluate_keys(attr.keys, self.time)
+        return attr.value
+
+    def setAttr(self, plug, *values, **kwargs):
+        node, attr = self.resolve_plug(plug)
+        if 'lock' in kwargs or 'l' in kwargs:
+            attr.locked = kwargs.get('lock', kwargs.get('l'))
+        if 'keyable' in kwargs or 'k' in kwargs:
+            attr.keyable = kwargs.get('keyable', kwargs.get('k'))
+        if 'channelBox' in kwargs or 'cb' in kwargs:
+            attr.channel_box = kwargs.get('channelBox', kwargs.get('cb'))
+        if values:
+            if attr.locked:
+                raise RuntimeError(
+                    'The attribute \'{}\' is locked'.format(plug))
+            attr.value = values[0] if len(values) == 1 else tuple(values)
+
+    def addAttr(self, *args, **kwargs):
+        names = _as_list(args) or [self.display_name(self.selection[-1])]
+        node = self.resolve(names[0])
+        long = kwargs.get('longName') or kwargs.get('ln')
+        default = kwargs.get('defaultValue', kwargs.get('dv', 0.0))
+        node.attrs[long] = Attr(
+            long,
+            kwargs.get('shortName') or kwargs.get('sn') or long,
+            default,
+            kwargs.get('keyable', kwargs.get('k', 0)),
+            dynamic=1
+        )
+
+    def listAttr(self, *args, **kwargs):
+        names = _as_list(args)
+        if not names:
+            return None
+        if '.' in names[0]:
+            return None
+        node = self.resolve(names[0])
+        attrs = list(node.attrs.values())
+        if kwargs.get('keyable') or kwargs.get('k'):
+            attrs = [attr for attr in attrs if attr.keyable]
+        if kwargs.get('channelBox') or kwargs.get('cb'):
+            attrs = [attr for attr in attrs
+                     if attr.channel_box and not attr.keyable]
+        if kwargs.get('userDefined') or kwargs.get('ud'):
+            attrs = [attr for attr in attrs if attr.dynamic]
+        if kwargs.get('locked') or kwargs.get('l'):
+            attrs = [attr for attr in attrs if attr.locked]
+        if not attrs:
+            return None
+        if kwargs.get('shortNames') or kwargs.get('sn'):
+            return [attr.short for attr in attrs]
+        return [attr.long for attr in attrs]
+
+    def listAnimatable(self, *args, **kwargs):
+        result = list()
+        for name in _as_list(args):
+            node = self.resolve(name)
+            result.extend(
+                '{}.{}'.format(self.long_name(node), attr.long)
+                for attr in node.attrs.values()
+                if attr.keyable
+            )
+        return result or None
+
+    def attributeQuery(self, attr_name, node=None, n=None, **kwargs):
+        target = self.resolve(node or n)
+        attr = target.get_attr(attr_name)
+        if kwargs.get('exists') or kwargs.get('ex'):
+            return attr is not None
+        if attr is None:
+            raise RuntimeError(
+                'No attribute {} on {}'.format(attr_name, target.name))
+        if kwargs.get('listDefault') or kwargs.get('ld'):
+            if attr.default is None:
+                return None
+            return [attr.default]
+        if kwargs.get('keyable') or kwargs.get('k'):
+            return bool(attr.keyable)
+        if kwargs.get('channelBox') or kwargs.get('cb'):
+            return bool(attr.channel_box)
+        if kwargs.get('shortName') or kwargs.get('sn'):
+            return attr.short
+        if kwargs.get('longName') or kwargs.get('ln'):
+            return attr.long
+        if kwargs.get('attributeType') or kwargs.get('at'):
+            if isinstance(attr.default, bool):
+                return 'bool'
+            if isinstance(attr.default, (int, float)):
+                return 'doubleLinear'
+            return 'message'
+        return None
+
+    def connectAttr(self, source, destination, force=0, f=0, **kwargs):
+        src_node, src_attr = self.resolve_plug(source)
+        dst_node, dst_attr = self.resolve_plug(destination)
+        key = (id(dst_node), dst_attr.long)
+        if key in self.connections and not (force or f):
+            raise RuntimeError(
+                '{} already has an incoming connection'.format(destination))
+        self.connections[key] = (src_node, src_attr)
+
+    def disconnectAttr(self, source, destination, **kwargs):
+        dst_node, dst_attr = self.resolve_plug(destination)
+        self.connections.pop((id(dst_node), dst_attr.long), None)
+
+    def connectionInfo(self, plug, **kwargs):
+        node, attr = self.resolve_plug(plug)
+        source = self.get_source(node, attr)
+        if kwargs.get('isDestination') or kwargs.get('id'):
+            return source is not None
+        if kwargs.get('isSource') or kwargs.get('is'):
+            return any(
+                src[0] is node and src[1] is attr
+                for src in self.connections.values()
+            )
+        if kwargs.get('getExactDestination') or kwargs.get('ged'):
+            return self.plug_name(node, attr)
+        if kwargs.get('sourceFromDestination') or kwargs.get('sfd'):
+            return self.plug_name(*source) if source else ''
+        return None
+
+    def listConnections(self, *args, **kwargs):
+        result = list()
+        source_only = kwargs.get('source') or kwargs.get('s')
+        destination_only = kwargs.get('destination') or kwargs.get('d')
+        for name in _as_list(args):
+            if '.' in name:
+                node, attr = self.resolve_plug(name)
+                attrs = [attr.long]
+            else:
+                node = self.resolve(name)
+                attrs = None
+            for (dst_id, dst_attr), (src, src_attr) in self.connections.items():
+                if not destination_only and dst_id == id(node) and \
+                        (attrs is None or dst_attr in attrs):
+                    result.append(src)
+                if not source_only and src is node and \
+                        (attrs is None or src_attr.long in attrs):
+                    result.append(self.nodes[dst_id])
+        typ = kwargs.get('type') or kwargs.get('t')
+        if typ:
+            result = [node for node in result if is_type_of(node.type, typ)]
+        if not result:
+            return None
+        return [self.display_name(node) for node in result]
+
+    def listHistory(self, *args, **kwargs):
+        result = list()
+        stack = [self.resolve(name) for name in _as_list(args)]
+        seen = set()
+        while stack:
+            node = stack.pop()
+            if id(node) in seen:
+                continue
+            seen.add(id(node))
+            result.append(node)
+            for (dst_id, _), (src, _) in self.connections.items():
+                if dst_id == id(node):
+                    stack.append(src)
+        return [self.display_name(node) for node in result]
+
+    def namespaceInfo(self, *args, **kwargs):
+        if kwargs.get('listOnlyNamespaces') or kwargs.get('lon'):
+            if kwargs.get('recurse') or kwargs.get('r'):
+                return ['UI', 'shared'] + sorted(self.namespaces)
+            return ['UI', 'shared'] + sorted(
+                ns for ns in self.namespaces if ':' not in ns)
+        if kwargs.get('currentNamespace') or kwargs.get('cur'):
+            return ':'
+        return None
+
+    def namespace(self, *args, **kwargs):
+        if kwargs.get('addNamespace') or kwargs.get('add'):
+            self.namespaces.add(
+                (kwargs.get('addNamespace') or kwargs.get('add')).strip(':'))
+            return
+        if 'rename' in kwargs:
+            old, new = [ns.strip(':') for ns in kwargs['rename']]
+            parent = (kwargs.get('parent') or '').strip(':')
+            self._move_namespace(old, ':'.join(filter(None, [parent, new])))
+            return
+
+        namespace = (kwargs.get('removeNamespace') or
+                     kwargs.get('rm')).strip(':')
+        if namespace not in self.namespaces:
+            raise RuntimeError(
+                'Namespace \'{}\' does not exist'.format(namespace))
+        if kwargs.get('deleteNamespaceContent'):
+            prefix = namespace + ':'
+            for node in list(self.nodes.values()):
+                if id(node) in self.nodes and node.name.startswith(prefix):
+                    self._remove(node)
+            self.namespaces = set(
+                ns for ns in self.namespaces
+                if ns != namespace and not ns.startswith(prefix))
+        elif kwargs.get('mergeNamespaceWithParent'):
+            self._move_namespace(namespace, namespace.rpartition(':')[0])
+        else:
+            self._move_namespace(namespace, '')
+
+    def _move_namespace(self, old, new):
+        prefix = old + ':'
+        for node in list(self.nodes.values()):
+            if node.name.startswith(prefix):
+                rest = node.name[len(prefix):]
+                self._rename(node, ':'.join(filter(None, [new, rest])))
+        namespaces = set()
+        for ns in self.namespaces:
+            if ns == old:
+                if new:
+                    namespaces.add(new)
+            elif ns.startswith(prefix):
+                namespaces.add(':'.join(filter(None, [new, ns[len(prefix):]])))
+            else:
+                namespaces.add(ns)
+        self.namespaces = namespaces
+
+    def undoInfo(self, *args, **kwargs):
+        return None
+
+    def undo(self, *args, **kwargs):
+        return None
+
+    def refresh(self, *args, **kwargs):
+        return None
+
+    def channelBox(self, *args, **kwargs):
+        return None
+
+    def evaluationManager(self, *args, **kwargs):
+        if kwargs.get('query') or kwargs.get('q'):
+            return ['off']
+        return None
+
+    def currentTime(self, *args, **kwargs):
+        if args:
+            self.time = float(args[0])
+        return self.time
+
+    def _evaluate_keys(self, keys, time):
+        times = sorted(keys)
+        if time <= times[0]:
+            return keys[times[0]]
+        for start, end in zip(times, times[1:]):
+            if start <= time <= end:
+                weight = (time - start) / float(end - start)
+                return keys[start] + (keys[end] - keys[start]) * weight
+        return keys[times[-1]]
+
+    def setKeyframe(self, *args, **kwargs):
+        names = _as_list(args)
+        attribute = kwargs.get('attribute') or kwargs.get('at')
+        time = kwargs.get('time', kwargs.get('t', self.time))
+        for name in names:
+            plug = name if not attribute else '{}.{}'.format(name, attribute)
+            node, attr = self.resolve_plug(plug)
+            value = kwargs.get('value', kwargs.get('v'))
+            if value is None:
+                value = attr.value
+            if attr.keys is None:
+                attr.keys = dict()
+            attr.keys[float(_as_list(time)[0])] = value
+        return len(names)
+
+    def keyframe(self, *args, **kwargs):
+        names = _as_list(args)
+        attribute = kwargs.get('attribute') or kwargs.get('at')
+        plug = names[0] if not attribute else '{}.{}'.format(
+            names[0], attribute)
+        node, attr = self.resolve_plug(plug)
+        if kwargs.get('keyframeCount') or kwargs.get('kc'):
+            return len(attr.keys or ())
+        return sorted(attr.keys or ()) or None
+
+    def copyKey(self, *args, **kwargs):
+        names = _as_list(args)
+        attribute = kwargs.get('attribute') or kwargs.get('at')
+        start, end = kwargs.get('time', kwargs.get('t', (None, None)))
+        node, attr = self.resolve_plug('{}.{}'.format(names[0], attribute))
+        keys = dict(
+            (time, value) for time, value in (attr.keys or dict()).items()
+            if start is None or start <= time <= end
+        )
+        self.clipboard = keys
+        return len(keys)
+
+    def pasteKey(self, *args, **kwargs):
+        names = _as_list(args)
+        attribute = kwargs.get('attribute') or kwargs.get('at')
+        node, attr = self.resolve_plug('{}.{}'.format(names[0], attribute))
+        if attr.keys is None:
+            attr.keys = dict()
+        attr.keys.update(self.clipboard or dict())
+        return len(self.clipboard or ())
+
+    def bakeResults(self, *args, **kwargs):
+        start, end = kwargs.get('time', kwargs.get('t'))
+        for name in _as_list(args):
+            node = self.resolve(name)
+            for attr in node.attrs.values():
+                if attr.keyable:
+                    attr.keys = dict(
+                        (float(frame), attr.value)
+                        for frame in range(int(start), int(end) + 1)
+                    )
+        return 0
+
+    def expression(self, *args, **kwargs):
+        node = self.add_node('expression', kwargs.get('name') or
+                             'expression#')
+        destination, _, source = kwargs.get('string', '').partition('=')
+        source = source.split('*')[0]
+        src_node, src_attr = self.resolve_plug(source.strip())
+        dst_node, dst_attr = self.resolve_plug(destination.strip())
+        self.connections[(id(dst_node), dst_attr.long)] = (
+            node, node.get_attr('message'))
+        return self.display_name(node)
+
+    def setDrivenKeyframe(self, *args, **kwargs):
+        names = _as_list(args)
+        attribute = kwargs.get('attribute') or kwargs.get('at')
+        driver = kwargs.get('currentDriver') or kwargs.get('cd')
+        dst_node, dst_attr = self.resolve_plug(
+            '{}.{}'.format(names[0], attribute))
+        source = self.get_source(dst_node, dst_attr)
+        if source is None or not is_type_of(source[0].type, 'animCurve'):
+            curve = self.add_node('animCurveUU', '{}_{}#'.format(
+                dst_node.name, dst_attr.long))
+            self.connections[(id(dst_node), dst_attr.long)] = (
+                curve, curve.get_attr('output'))
+            src_node, src_attr = self.resolve_plug(driver)
+            self.connections[(id(curve), 'input')] = (src_node, src_attr)
+        else:
+            curve = source[0]
+        output = curve.get_attr('output')
+        if output.keys is None:
+            output.keys = dict()
+        output.keys[kwargs.get('driverValue', kwargs.get('dv'))] = \
+            kwargs.get('value', kwargs.get('v'))
+        return 1
+
+    def lockNode(self, *args, **kwargs):
+        nodes = [self.resolve(name) for name in _as_list(args)]
+        if kwargs.get('q') or kwargs.get('query'):
+            return [bool(node.locked) for node in nodes]
+        for node in nodes:
+            node.locked = kwargs.get('l', kwargs.get('lock', 1))
+
+    def unknownPlugin(self, *args, **kwargs):
+        if kwargs.get('q') or kwargs.get('query'):
+            return list(self.unknown_plugins) or None
+        if kwargs.get('remove') or kwargs.get('r'):
+            for name in _as_list(args):
+                self.unknown_plugins.remove(name)
+
+    def pluginInfo(self, *args, **kwargs):
+        if kwargs.get('listPlugins'):
+            return list()
+        return False
+
+    def getPanel(self, *args, **kwargs):
+        return list()
+
+    def modelEditor(self, *args, **kwargs):
+        return None
+
+    def playbackOptions(self, *args, **kwargs):
+        return 1.0
+
+
+def _counted(name, func):
+    def wrap(*args, **kwargs):
+        _CALLS[name] = _CALLS.get(name, 0) + 1
+        return func(*args, **kwargs)
+    wrap.__name__ = name
+    return wrap
+
+
+class _Unavailable(object):
+    """
+    Placeholder for anything accessed on the Maya API modules
+    """
+
+    def __init__(self, name):
+        self._name = name
+
+    def __getattr__(self, name):
+        return _Unavailable('{}.{}'.format(self._name, name))
+
+    def __call__(self, *args, **kwargs):
+        raise ApiUnavailableError(
+            '{} is not available in the stand-in scene'.format(self._name))
+
+    def __iter__(self):
+        raise ApiUnavailableError(
+            '{} is not available in the stand-in scene'.format(self._name))
+
+
+class _ApiModule(types.ModuleType):
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        return _Unavailable('{}.{}'.format(self.__name__, name))
+
+
+def new_scene():
+    """
+    Start a new empty stand-in scene and point maya.cmds at it
+
+    :return: Scene.
+    """
+    global _SCENE
+    _SCENE = Scene()
+    module = sys.modules.get('maya.cmds')
+    if module is not None:
+        for name in dir(Scene):
+            if not name.startswith('_') and name[0].islower() and \
+                    name not in ('add_node', 'long_name', 'display_name',
+                                 'find', 'resolve', 'resolve_plug',
+                                 'plug_name', 'get_source',
+                                 'iter_descendants'):
+                setattr(module, name, _counted(name, getattr(_SCENE, name)))
+    return _SCENE
+
+
+def get_scene():
+    """
+    :return: Scene. the current stand-in scene
+    """
+    return _SCENE
+
+
+def install():
+    """
+    Register the stand-in as the maya, maya.cmds, maya.mel and
+    maya.api.OpenMaya modules
+
+    :return: Scene. a new empty stand-in scene
+    """
+    maya = types.ModuleType('maya')
+    cmds = types.ModuleType('maya.cmds')
+    mel = types.ModuleType('maya.mel')
+    api = types.ModuleType('maya.api')
+    open_maya = _ApiModule('maya.api.OpenMaya')
+    open_maya_anim = _ApiModule('maya.api.OpenMayaAnim')
+
+    mel.eval = _counted('mel.eval', lambda *args, **kwargs: None)
+    maya.cmds = cmds
+    maya.mel = mel
+    maya.api = api
+    api.OpenMaya = open_maya
+    api.OpenMayaAnim = open_maya_anim
+
+    sys.modules['maya'] = maya
+    sys.modules['maya.cmds'] = cmds
+    sys.modules['maya.mel'] = mel
+    sys.modules['maya.api'] = api
+    sys.modules['maya.api.OpenMaya'] = open_maya
+    sys.modules['maya.api.OpenMayaAnim'] = open_maya_anim
+
+    return new_scene()
+
+
+def reset_calls():
+    """
+    Reset the command call counters
+    """
+    _CALLS.clear()
+
+
+def get_call_count(name=None):
+    """
+    Get the number of commands called since the last reset
+
+    :param name: str. command name, defaults to all commands
+    :return: int. call count
+    """
+    if name:
+        return _CALLS.get(name, 0)
+    return sum(_CALLS.values())
+
+
+def get_calls():
+    """
+    :return: dict. command name: call count since the last reset
+    """
+    return dict(_CALLS)
+
+
+def build_scene(size, seed_namespaces=10):
+    """
+    Build a synthetic scene of roughly the given number of DAG nodes:
+    character-like groups of transform/mesh pairs and joint chains,
+    a share of clashing short names, namespaces and unknown nodes
+
+    :param size: int. approximate number of DAG nodes
+    :param seed_namespaces: int. number of top namespaces
+    :return: Scene.
+    """
+    scene = new_scene()
+    per_group = 50
+    groups = max(1, size // (per_group * 2))
+    for group_index in range(groups):
+        namespace = 'ns{}:'.format(group_index % seed_namespaces) \
+            if group_index % 4 == 0 else ''
+        group = scene.add_node(
+            'transform', '{}grp{}'.format(namespace, group_index))
+        parent = group
+        for index in range(per_group // 2):
+            # every 10th name clashes with the same name in other groups
+            name = 'geo{}'.format(index) if index % 10 == 0 else \
+                'geo{}_{}'.format(group_index, index)
+            xform = scene.add_node('transform', namespace + name, group)
+            scene.add_node('mesh', namespace + name + 'Shape', xform)
+
+            joint = scene.add_node(
+                'joint',
+                '{}jnt{}_{}'.format(namespace, group_index, index),
+                parent
+            )
+            parent = joint
+
+    for index in range(max(1, size // 1000)):
+        scene.add_node('unknown', 'unknown{}'.format(index))
+        scene.unknown_plugins.append('plugin{}'.format(index))
+    return scene
+
@@ -0,0 +1,82 @@
+"""
+Channel snapshot round-trip check
+
+Captures rotated and translated transforms with common.snapshot, changes
+their channels (values, lock and keyable state), restores the snapshot and
+compares every channel against the captured values in ui units. Needs a
+Maya session, run it with mayapy.
+
+Usage (from the directory containing the package):
+    mayapy -m mayaUtil.bench.snapshot --nodes 200
+"""
+
+import argparse
+import importlib
+import sys
+import time
+
+_PACKAGE = __package__.rpartition('.')[0]
+
+# attribute: value in ui units
+CHANNELS = (
+    ('translateX', 12.5),
+    ('translateY', -3.0),
+    ('rotateX', 45.0),
+    ('rotateY', 30.0),
+    ('rotateZ', -170.0),
+    ('scaleZ', 2.0),
+)
+
+
+def main(argv=None):
+    """
+    :param argv: list. command line arguments
+    :return: int. exit code, 1 if a restored channel doesn't match
+    """
+    parser = argparse.ArgumentParser(description='channel snapshot check')
+    parser.add_argument('--nodes', type=int, default=200)
+    parser.add_argument('--tolerance', type=float, default=1e-6)
+    args = parser.parse_args(argv)
+
+    import maya.standalone
+    maya.standalone.initialize()
+
+    import maya.cmds as cmds
+    snapshot = importlib.import_module(
+        '{}.common.snapshot'.format(_PACKAGE))
+
+    nodes = list()
+    for i in range(args.nodes):
+        node = cmds.createNode('transform', name='snapshot{}'.format(i))
+        for attr, value in CHANNELS:
+            cmds.setAttr('{}.{}'.format(node, attr), value)
+        nodes.append(node)
+
+    start = time.time()
+    before = snapshot.ChannelSnapshot.capture(nodes)
+    capture_time = time.time() - start
+
+    for node in nodes:
+        for attr, _ in CHANNELS:
+            cmds.setAttr('{}.{}'.format(node, attr), 0.25)
+        cmds.setAttr('{}.rotateX'.format(node), lock=1)
+        cmds.setAttr('{}.translateY'.format(node), keyable=0)
+
+    start = time.time()
+    before.restore()
+    restore_time = time.time() - start
+
+    error = max(
+        abs(cmds.getAttr('{}.{}'.format(node, attr)) - value)
+        for node in nodes
+        for attr, value in CHANNELS
+    )
+    states = before.recapture().diff(before)
+    print('capture: {:.1f} ms, restore: {:.1f} ms, max error: {:g}, '
+          'changed after restore: {}'.format(
+              capture_time * 1000, restore_time * 1000, error, len(states)))
+    return 0 if error <= args.tolerance and not states else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
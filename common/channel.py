@@ -1,26 +1,66 @@
+from array import array
+from collections import OrderedDict
+
 import maya.cmds as cmds
+from maya.api import OpenMaya as om
+
+from . import dag, schema
+from .decorator import undo_chunk
+
+
+# attribute: (lock, keyable, value in ui units or None to keep the current
+# value)
+DEFAULT_CHANNEL_PROFILE = OrderedDict(
+    [
+        ('{}{}'.format(transform, axis), (0, 1, None))
+        for transform in 'trs' for axis in 'xyz'
+    ] + [('visibility', (0, 1, 1))]
+)
+
+# values closer than this are equal, absorbs ui unit conversion round-off
+VALUE_TOLERANCE = 1e-9
+
+# connection validation status codes
+CONNECTION_VALID = 0
+CONNECTION_NOT_ATTRIBUTE = 1
+CONNECTION_NO_NODE = 2
+CONNECTION_NO_ATTRIBUTE = 3
+CONNECTION_NOT_KEYABLE = 4
+CONNECTION_CONNECTED = 5
+
+CONNECTION_MESSAGES = {
+    CONNECTION_VALID: 'Validation Complete',
+    CONNECTION_NOT_ATTRIBUTE: '*{attribute}* is not an attribute',
+    CONNECTION_NO_NODE: '*{node}* object does not exist',
+    CONNECTION_NO_ATTRIBUTE: '*{attribute}* attribute does not exist',
+    CONNECTION_NOT_KEYABLE: '*{attribute}* attribute not keyable or locked',
+    CONNECTION_CONNECTED: '*{attribute}* attribute already connected',
+}
 
 
 def get_attrs_channel(node):
     """
-    Get all attributes of the node displayed in the channel box
-    TODO: test and clean up the code
+    Get all attributes of the node displayed in the channel box,
+    in the order maya lists them
 
     :param node: str. maya node name (cannot be a blendshape node)
     :return: list. attributes
     """
-    attributes = list()
-
-    attrs = cmds.listAttr(node)
-    cb_attrs = cmds.listAnimatable(node)
-    if attrs and cb_attrs:
-        ordered_attrs = [
-            attr for attr in attrs
-            for cb_attr in cb_attrs
-            if cb_attr.endswith(attr)
-        ]
-        attributes.extend(ordered_attrs)
-
+    # listAnimatable also lists attributes of the shape nodes
+    leaf = node.rsplit('|', 1)[-1]
+    cb_attrs = list()
+    for plug in cmds.listAnimatable(node) or list():
+        plug_node, _, attr = plug.partition('.')
+        if plug_node.rsplit('|', 1)[-1] == leaf:
+            cb_attrs.append(attr)
+    if not cb_attrs:
+        return list()
+
+    node_schema = schema.get_schema(node)
+    lookup = set(cb_attrs)
+    attributes = [attr for attr in node_schema.long_names if attr in lookup]
+    # dynamic attributes are not part of the node type schema
+    attributes.extend(attr for attr in cb_attrs if attr not in node_schema)
     return attributes
 
 
@@ -44,27 +84,164 @@ def get_attrs_selected():
     return attrs
 
 
+def to_ui_value(plug, value):
+    """
+    Convert a plug value from internal units (e.g. MPlug.asDouble())
+    to the ui units used by cmds.setAttr and cmds.getAttr
+
+    :param plug: MPlug. maya plug the value belongs to
+    :param value: float. value in internal units
+    :return: float. value in ui units
+    """
+    attribute = plug.attribute()
+    if attribute.hasFn(om.MFn.kUnitAttribute):
+        unit_type = om.MFnUnitAttribute(attribute).unitType()
+        if unit_type == om.MFnUnitAttribute.kAngle:
+            return om.MAngle(value).asUnits(om.MAngle.uiUnit())
+        if unit_type == om.MFnUnitAttribute.kDistance:
+            return om.MDistance(value).asUnits(om.MDistance.uiUnit())
+    return value
+
+
 def restore_channel(obj):
     """
     restore channel box to default setting
 
     :param obj: str. scene object
     """
-    kwargs = {
-        'lock': 0,
-        'keyable': 1,
-    }
+    restore_channels([obj])
+
+
+@undo_chunk
+def restore_channels(nodes, profile=None):
+    """
+    Restore lock, keyable state and value of channels on many nodes
+    as a single undo step, the current state is read through MPlug and
+    only the settings that differ from the profile are written
+
+    :param nodes: list. maya nodes
+    :param profile: dict. attribute: (lock, keyable, value in ui units or
+                    None), defaults to DEFAULT_CHANNEL_PROFILE
+    :return: dict. changed attribute full name: {setting: (old, new)},
+             values in ui units
+    """
+    if profile is None:
+        profile = DEFAULT_CHANNEL_PROFILE
+
+    report = OrderedDict()
+    for node, mobject in zip(nodes, dag.get_dag_nodes(nodes)):
+        fn_node = om.MFnDependencyNode(mobject)
+        for attr, (lock, keyable, value) in profile.items():
+            plug = fn_node.findPlug(attr, False)
+            changes = OrderedDict()
+            if plug.isLocked != bool(lock):
+                changes['lock'] = (plug.isLocked, bool(lock))
+            if plug.isKeyable != bool(keyable):
+                changes['keyable'] = (plug.isKeyable, bool(keyable))
+            if value is not None:
+                old_value = to_ui_value(plug, plug.asDouble())
+                if abs(old_value - value) > VALUE_TOLERANCE:
+                    changes['value'] = (old_value, value)
+            if not changes:
+                continue
+
+            attribute = '{}.{}'.format(node, attr)
+            kwargs = dict(
+                (setting, changes[setting][1])
+                for setting in ('lock', 'keyable')
+                if setting in changes
+            )
+            # a locked value can't be set, unlock first and lock again after
+            # if the profile keeps it locked, which is not a reported change
+            if 'value' in changes:
+                if plug.isLocked:
+                    cmds.setAttr(attribute, lock=0)
+                    kwargs['lock'] = bool(lock)
+                cmds.setAttr(attribute, value)
+            if kwargs:
+                cmds.setAttr(attribute, **kwargs)
+            report[attribute] = dict(changes)
+    return report
+
+
+def get_attr_default(node, channel, node_type=None):
+    """
+    Get the long name and default value of an attribute,
+    defaults of static attributes come from the node type schema,
+    defaults of dynamic attributes are queried from the node
+
+    :param node: str. maya node
+    :param channel: str. attribute long or short name
+    :param node_type: str. node type, queried if not given
+    :return: tuple. attribute long name and default value (None if no default)
+    """
+    if schema.get_schema(node, node_type).find(channel) is not None:
+        attr = schema.get_attr(node, channel, node_type)
+        return attr.long, attr.default
+
+    # dynamic attribute, keyable and channel box state are not needed here
+    long_name = cmds.attributeQuery(channel, node=node, longName=1)
+    default_value = cmds.attributeQuery(channel, node=node, listDefault=1)
+    return long_name, default_value[0] if default_value else None
+
+
+def clear_attr_defaults(node=None):
+    """
+    Clear cached attribute defaults, defaults of dynamic attributes are
+    never cached
+
+    :param node: str. only clear the defaults of the node type of this node
+    """
+    schema.clear(cmds.nodeType(node) if node else None)
+
+
+@undo_chunk
+def reset_node_attrs(nodes, channels=None):
+    """
+    Reset attributes of nodes to default values as a single undo step,
+    locked attributes are skipped
+
+    :param nodes: list. maya nodes
+    :param channels: list. attribute names, defaults to all keyable
+                     attributes of each node
+    :return: list. full name of the reset attributes
+    """
+    reset = list()
+    for node in nodes:
+        node_type = cmds.nodeType(node)
+        locked_attrs = set(cmds.listAttr(node, locked=1) or list())
+
+        node_channels = channels
+        if not node_channels:
+            node_channels = cmds.listAttr(
+                node,
+                keyable=1,
+                read=1,
+                write=1,
+                connectable=1
+                ) or list()
+
+        for channel in node_channels:
+            long_name, default_value = get_attr_default(
+                node,
+                channel,
+                node_type
+            )
+            if long_name in locked_attrs or default_value is None:
+                continue
 
-    for transform in ['t', 'r', 's']:
-        for axis in ['x', 'y', 'z']:
-            cmds.setAttr('{}.{}{}'.format(obj, transform, axis), **kwargs)
-    cmds.setAttr('{}.visibility'.format(obj), **kwargs)
-    cmds.setAttr('{}.visibility'.format(obj), 1)
+            attribute = "{0}.{1}".format(node, channel)
+            cmds.setAttr(attribute, default_value)
+            reset.append(attribute)
+
+    return reset
 
 
 def reset_attrs():
     """
     Reset selected attributes to default values
+
+    :return: list. full name of the reset attributes
     """
     selected_channels = cmds.channelBox(
         'mainChannelBox',
@@ -74,26 +251,7 @@ def reset_attrs():
         q=1
         )
 
-    for selection in cmds.ls(selection=1):
-        if not selected_channels:
-            selected_channels = cmds.listAttr(
-                selection,
-                keyable=1,
-                read=1,
-                write=1,
-                connectable=1
-                ) or list()
-
-        for channel in selected_channels:
-            attribute = "{0}.{1}".format(selection, channel)
-            if not cmds.getAttr(attribute, lock=1):
-                default_value = cmds.attributeQuery(
-                    channel,
-                    node=selection,
-                    listDefault=1
-                )
-                if default_value:
-                    cmds.setAttr(attribute, default_value[0])
+    return reset_node_attrs(cmds.ls(selection=1), selected_channels)
 
 
 def get_attrs_unbinded(node):
@@ -112,14 +270,20 @@ def get_attrs_unbinded(node):
     return unbind_attrs
 
 
-def connect_weighted(source, destination, ratio):
+def connect_weighted(source, destination, ratio, use_node=0):
     """
-    Weighted connection using expression
+    Weighted connection using expression or a multDoubleLinear node,
+    nodes don't force serial evaluation in parallel evaluation mode
 
     :param source: str. source attribute
     :param destination: str. destination attribute
     :param ratio: float. weighting ratio between connection
+    :param use_node: bool. use a multDoubleLinear node instead of expression
+    :return: list. created multiply node names, empty for expression
     """
+    if use_node:
+        return connect_weighted_batch([(source, destination, ratio)])
+
     try:
         cmds.expression(
             string='{}={}*{}'.format(destination, source, ratio),
@@ -128,6 +292,65 @@ def connect_weighted(source, destination, ratio):
         )
     except Exception as e:
         raise e
+    return list()
+
+
+def get_plugs(attributes, skip_missing=0):
+    """
+    Resolve attribute names to plugs through one selection list
+
+    :param attributes: list. unique attribute full names
+    :param skip_missing: bool. leave out attributes that don't exist
+                         instead of raising RuntimeError
+    :return: dict. attribute full name: MPlug
+    """
+    plugs = dict()
+    selection = om.MSelectionList()
+    for attribute in attributes:
+        length = selection.length()
+        try:
+            selection.add(attribute)
+        except RuntimeError:
+            if not skip_missing:
+                raise
+            continue
+        # different names of the same plug are merged by the selection
+        # list, those are resolved on their own
+        if selection.length() == length:
+            single = om.MSelectionList()
+            single.add(attribute)
+            plugs[attribute] = single.getPlug(0)
+        else:
+            plugs[attribute] = selection.getPlug(length)
+    return plugs
+
+
+@undo_chunk
+def connect_weighted_batch(connections):
+    """
+    Weighted connections using multDoubleLinear nodes as a single undo step,
+    connections with the same source and ratio share one node and a ratio
+    of 1 connects directly
+
+    :param connections: list. (source attribute, destination attribute, ratio)
+    :return: list. created multiply node names
+    """
+    # (source, ratio): multiply node shared by all destinations
+    multiply_nodes = OrderedDict()
+    for source, destination, ratio in connections:
+        if ratio == 1:
+            cmds.connectAttr(source, destination)
+            continue
+
+        key = (source, float(ratio))
+        if key not in multiply_nodes:
+            node = cmds.createNode('multDoubleLinear')
+            cmds.connectAttr(source, '{}.input1'.format(node))
+            cmds.setAttr('{}.input2'.format(node), float(ratio))
+            multiply_nodes[key] = node
+        cmds.connectAttr('{}.output'.format(multiply_nodes[key]), destination)
+
+    return list(multiply_nodes.values())
 
 
 def connect_drivenkey(source, src_min, src_max, destination, dst_min, dst_max):
@@ -164,6 +387,54 @@ def connect_drivenkey(source, src_min, src_max, destination, dst_min, dst_max):
         raise e
 
 
+# tangent types of driven keys
+TANGENT_TYPES = ('auto', 'clamped', 'flat', 'linear', 'spline', 'step')
+
+# driven attribute type: driven key curve type, other types use animCurveUU
+DRIVEN_CURVE_TYPES = {
+    'doubleAngle': 'animCurveUA',
+    'doubleLinear': 'animCurveUL',
+}
+
+
+@undo_chunk
+def connect_drivenkeys(mappings, tangent='linear'):
+    """
+    Mapped connections using driven key curves as a single undo step,
+    each curve is created, keyed and connected directly instead of going
+    through setDrivenKeyframe, supports any number of points per mapping
+
+    :param mappings: list. (driver attribute, driver values,
+                     driven attribute, driven values) in ui units
+    :param tangent: str. tangent type name, see TANGENT_TYPES
+    :return: list. created anim curve names
+    """
+    if tangent not in TANGENT_TYPES:
+        raise ValueError('unknown tangent type {}'.format(tangent))
+    for driver, driver_values, driven, driven_values in mappings:
+        if len(driver_values) != len(driven_values):
+            raise ValueError(
+                '{} -> {} has {} driver values and {} driven values'.format(
+                    driver, driven, len(driver_values), len(driven_values)))
+
+    curves = list()
+    for driver, driver_values, driven, driven_values in mappings:
+        curve = cmds.createNode(DRIVEN_CURVE_TYPES.get(
+            cmds.getAttr(driven, type=1), 'animCurveUU'))
+        for driver_value, driven_value in zip(driver_values, driven_values):
+            cmds.setKeyframe(
+                curve,
+                float=float(driver_value),
+                value=float(driven_value),
+                inTangentType=tangent,
+                outTangentType=tangent
+            )
+        cmds.connectAttr(driver, '{}.input'.format(curve))
+        cmds.connectAttr('{}.output'.format(curve), driven)
+        curves.append(curve)
+    return curves
+
+
 def delete_connection(attr):
     """
     Break attribute connection: equivalent to channelbox break connection
@@ -182,6 +453,133 @@ def delete_connection(attr):
             cmds.delete(attr, icn=1)
 
 
+# node types deleted with their broken connections if nothing else uses them
+ORPHAN_TYPES = (
+    om.MFn.kAnimCurve,
+    om.MFn.kUnitConversion,
+    om.MFn.kBlendWeighted,
+    om.MFn.kPairBlend,
+)
+
+
+def _is_read_only(mobject):
+    """
+    Check if a node is read-only, as listed by cmds.ls(readOnly=1)
+
+    :param mobject: MObject. maya node
+    :return: bool. whether the node is referenced or a default node
+    """
+    fn_node = om.MFnDependencyNode(mobject)
+    return fn_node.isFromReferencedFile or fn_node.isDefaultNode
+
+
+def _is_orphan(mobject, broken):
+    """
+    Check if all outgoing connections of a node are being broken
+
+    :param mobject: MObject. source node
+    :param broken: set. (source plug, destination plug) names being broken
+    :return: bool. whether the node is left without outgoing connections
+    """
+    for plug in om.MFnDependencyNode(mobject).getConnections():
+        for destination in plug.destinations():
+            if (plug.name(), destination.name()) not in broken:
+                return False
+    return True
+
+
+def _get_plug_name(plug):
+    """
+    :param plug: MPlug. maya plug
+    :return: str. plug name with a unique node name, usable by cmds
+    """
+    return '{}.{}'.format(
+        dag.get_node_name(plug.node()),
+        plug.partialName(
+            includeNonMandatoryIndices=True,
+            useFullAttributePath=True,
+            useLongNames=True
+        )
+    )
+
+
+@undo_chunk
+def delete_connections(targets, delete_orphans=0):
+    """
+    Break incoming connections of many attributes or whole nodes as a
+    single undo step: equivalent to channelbox break connection.
+    Connections are found through MPlug and broken with cmds
+
+    :param targets: list. attribute names, or node names to break all
+                    incoming connections of the node, missing attributes
+                    and nodes are skipped
+    :param delete_orphans: bool. also delete source nodes of ORPHAN_TYPES
+                           left without outgoing connections, like
+                           delete -icn does, destinations on read-only
+                           nodes never delete their sources
+    :return: dict. 'disconnect': list of (source, destination) names,
+             'delete': list of deleted node names
+    """
+    attributes = [target for target in targets if '.' in target]
+    nodes = [target for target in targets if '.' not in target]
+    plugs = list(get_plugs(
+        list(OrderedDict.fromkeys(attributes)), skip_missing=1).values())
+    mobjects = dag.get_dag_nodes(
+        list(OrderedDict.fromkeys(nodes)), skip_missing=1)
+    for mobject in mobjects:
+        if mobject is None:
+            continue
+        plugs.extend(
+            plug for plug in om.MFnDependencyNode(mobject).getConnections()
+            if plug.isDestination
+        )
+
+    disconnected = list()
+    broken = set()
+    # source node hash code: MObject
+    sources = OrderedDict()
+    # sources of read-only destinations, delete -icn doesn't work on them
+    kept = set()
+    for plug in plugs:
+        # a child of a connected compound is broken through its parent
+        plug = get_destination_plug(plug)
+        if plug is None:
+            continue
+        source = plug.source()
+        key = (source.name(), plug.name())
+        if key in broken:
+            continue
+
+        broken.add(key)
+        disconnected.append((_get_plug_name(source), _get_plug_name(plug)))
+
+        source_node = source.node()
+        source_key = om.MObjectHandle(source_node).hashCode()
+        sources[source_key] = source_node
+        if _is_read_only(plug.node()):
+            kept.add(source_key)
+
+    deleted = list()
+    if delete_orphans:
+        for source_key, mobject in sources.items():
+            if source_key in kept:
+                continue
+            if not any(mobject.hasFn(typ) for typ in ORPHAN_TYPES):
+                continue
+            if _is_orphan(mobject, broken):
+                deleted.append(dag.get_node_name(mobject))
+
+    for source, destination in disconnected:
+        cmds.disconnectAttr(source, destination)
+    if deleted:
+        cmds.delete(deleted)
+
+    return {
+        'disconnect': disconnected,
+        'delete': deleted,
+    }
+
+
 def validate_connection(attribute):
     """
     Validate if a attribute could be used in a connection
@@ -189,22 +587,112 @@ def validate_connection(attribute):
     :param attribute: str. attribute full name
     :return: list, [bool, string]. validation result and message
     """
-    obj, channel = attribute.split('.')
-
     if '.' not in attribute:
         return 0, '*{}* is not an attribute'.format(attribute)
 
+    obj, channel = attribute.split('.', 1)
+
     if not cmds.ls(obj):
         return 0, '*{}* object does not exist'.format(obj)
 
-    if not cmds.attributeQuery(channel, node=obj, ex=1):
+    if not cmds.attributeQuery(channel, node=obj, exists=1):
         return 0, '*{}* attribute does not exist'.format(attribute)
 
-    if not (cmds.attributeQuery(channel, node=obj, keyable=1)
-            and not cmds.getAttr(attribute, lock=1)):
+    # keyable state of the plug, setAttr -k can differ from the definition
+    if not cmds.getAttr(attribute, keyable=1) or \
+            cmds.getAttr(attribute, lock=1):
         return 0, '*{}* attribute not keyable or locked'.format(attribute)
 
     if cmds.connectionInfo(attribute, isDestination=1):
         return 0, '*{}* attribute already connected'.format(attribute)
 
     return 1, 'Validation Complete'
+
+
+def get_destination_plug(plug):
+    """
+    Get the plug holding the incoming connection of a plug, the plug itself
+    or its nearest connected parent compound, like
+    cmds.connectionInfo(getExactDestination=1)
+
+    :param plug: MPlug. maya plug
+    :return: MPlug. connected destination plug, None if not connected
+    """
+    while not plug.isDestination:
+        if not plug.isChild:
+            return None
+        plug = plug.parent()
+    return plug
+
+
+def _find_plug(fn_node, attribute, channel):
+    """
+    Find a plug by attribute name, falling back to a selection list for
+    compound and array attribute paths
+
+    :param fn_node: MFnDependencyNode. node function set
+    :param attribute: str. attribute full name
+    :param channel: str. attribute name on the node
+    :return: MPlug. None if the attribute doesn't exist
+    """
+    try:
+        return fn_node.findPlug(channel, False)
+    except RuntimeError:
+        pass
+
+    selection = om.MSelectionList()
+    try:
+        selection.add(attribute)
+        return selection.getPlug(0)
+    except (RuntimeError, TypeError):
+        return None
+
+
+def validate_connections(attributes):
+    """
+    Validate if attributes could be used as connection destinations in bulk,
+    nodes are resolved in bulk through dag.get_dag_nodes() and the attribute
+    state is read from MPlug
+
+    :param attributes: list. attribute full names
+    :return: tuple. (array of CONNECTION_* status codes, list of messages)
+                    in the same order as the attributes
+    """
+    split = [attribute.split('.', 1) for attribute in attributes]
+    nodes = list(OrderedDict.fromkeys(
+        names[0] for names in split if len(names) == 2))
+    mobjects = dict(
+        (node, mobject)
+        for node, mobject in zip(
+            nodes, dag.get_dag_nodes(nodes, skip_missing=1))
+        if mobject is not None
+    )
+
+    codes = array('B')
+    messages = list()
+    fn_nodes = dict()
+    for attribute, names in zip(attributes, split):
+        if len(names) != 2:
+            code = CONNECTION_NOT_ATTRIBUTE
+        elif names[0] not in mobjects:
+            code = CONNECTION_NO_NODE
+        else:
+            node, channel = names
+            if node not in fn_nodes:
+                fn_nodes[node] = om.MFnDependencyNode(mobjects[node])
+            plug = _find_plug(fn_nodes[node], attribute, channel)
+            if plug is None:
+                code = CONNECTION_NO_ATTRIBUTE
+            elif not plug.isKeyable or plug.isLocked:
+                code = CONNECTION_NOT_KEYABLE
+            elif get_destination_plug(plug) is not None:
+                code = CONNECTION_CONNECTED
+            else:
+                code = CONNECTION_VALID
+
+        codes.append(code)
+        messages.append(CONNECTION_MESSAGES[code].format(
+            attribute=attribute,
+            node=names[0]
+        ))
+    return codes, messages
@@ -1,6 +1,32 @@
+from collections import OrderedDict
+
+import maya.cmds as cmds
 from maya.api import OpenMaya as om
 
 
+# node types that can be filtered directly by the DAG iterator,
+# hasFn() follows inheritance the same way cmds.ls(type=) does
+MFN_TYPES = {
+    'transform': om.MFn.kTransform,
+    'joint': om.MFn.kJoint,
+    'constraint': om.MFn.kConstraint,
+    'shape': om.MFn.kShape,
+    'mesh': om.MFn.kMesh,
+    'nurbsCurve': om.MFn.kNurbsCurve,
+    'nurbsSurface': om.MFn.kNurbsSurface,
+    'locator': om.MFn.kLocator,
+    'camera': om.MFn.kCamera,
+}
+
+# maximum number of node names kept in the resolution cache
+CACHE_SIZE = 4096
+
+_DERIVED_TYPES = dict()
+_HANDLE_CACHE = OrderedDict()
+_TRAVERSAL_CACHE = dict()
+_TRAVERSAL_CALLBACKS = list()
+
+
 def get_dag_path(node=None):
     """
     Get DAG path of the specified node
@@ -8,68 +34,378 @@ def get_dag_path(node=None):
     :param node: str. maya node
     :return: MDagPath. Dag path of the maya node
     """
-    selection = om.MSelectionList()
-    selection.add(node)
-    dag_path = om.MDagPath()
-    selection.getDagPath(0, dag_path)
-    return dag_path
+    return get_dag_paths([node])[0]
+
+
+def get_dag_node(node=None):
+    """
+    Get Dependency Graph Node of the specified maya node
+
+    :param node: str. maya node
+    :return: MObject. MObject of the maya node
+    """
+    return get_dag_nodes([node])[0]
+
+
+def get_dag_nodes(nodes, skip_missing=0):
+    """
+    Get Dependency Graph Nodes of maya nodes in bulk,
+    names not in the resolution cache are resolved by one selection list
+
+    :param nodes: list. maya nodes
+    :param skip_missing: bool. return None for nodes that don't exist
+                         instead of raising RuntimeError
+    :return: list. MObject of each maya node, in the same order
+    """
+    mobjects = dict()
+    missing = OrderedDict()
+    for node in nodes:
+        if node in mobjects or node in missing:
+            continue
+        mobject = _get_cached_node(node)
+        if mobject is None:
+            missing[node] = None
+        else:
+            mobjects[node] = mobject
+
+    if missing:
+        selection = om.MSelectionList()
+        for node in missing:
+            length = selection.length()
+            try:
+                selection.add(node)
+            except RuntimeError:
+                if not skip_missing:
+                    raise
+                mobjects[node] = None
+                continue
+            # different names of the same node are merged by the selection
+            # list, those are resolved on their own
+            if selection.length() == length:
+                single = om.MSelectionList()
+                single.add(node)
+                mobject = single.getDependNode(0)
+            else:
+                mobject = selection.getDependNode(length)
+            _cache_node(node, mobject)
+            mobjects[node] = mobject
+
+    return [mobjects[node] for node in nodes]
+
+
+def get_dag_paths(nodes):
+    """
+    Get DAG paths of maya nodes in bulk
+
+    :param nodes: list. maya nodes
+    :return: list. MDagPath of each maya node, in the same order
+    """
+    paths = list()
+    instanced = list()
+    for node, mobject in zip(nodes, get_dag_nodes(nodes)):
+        if om.MFnDagNode(mobject).isInstanced():
+            # the name decides which instance path is meant
+            instanced.append(len(paths))
+            paths.append(None)
+        else:
+            paths.append(om.MDagPath.getAPathTo(mobject))
+
+    if instanced:
+        selection = om.MSelectionList()
+        for index in instanced:
+            selection.add(nodes[index])
+        for i, index in enumerate(instanced):
+            paths[index] = selection.getDagPath(i)
+
+    return paths
+
+
+def clear_cache():
+    """
+    Clear the node resolution cache
+    """
+    _HANDLE_CACHE.clear()
+
+
+def _get_cached_node(node):
+    """
+    Get the cached node of a name, stale entries are revalidated and dropped
+
+    :param node: str. maya node
+    :return: MObject. cached maya node, None if not cached or no longer valid
+    """
+    handle = _HANDLE_CACHE.pop(node, None)
+    if handle is None or not handle.isValid():
+        return None
+
+    mobject = handle.object()
+    # the node could have been renamed or re-parented since it was cached
+    if mobject.hasFn(om.MFn.kDagNode):
+        if not _is_dag_name(mobject, node):
+            return None
+    elif om.MFnDependencyNode(mobject).name() != node:
+        return None
+
+    # re-insert to mark it as the most recently used
+    _HANDLE_CACHE[node] = handle
+    return mobject
+
+
+def _is_dag_name(mobject, node):
+    """
+    Check if a name still resolves to a DAG node, full path names must
+    match one of the node paths and other names must be unique
+
+    :param mobject: MObject. DAG node
+    :param node: str. maya node name
+    :return: bool. whether the name names the node
+    """
+    for path in om.MDagPath.getAllPathsTo(mobject):
+        full_name = path.fullPathName()
+        if node.startswith('|'):
+            if full_name == node:
+                return True
+        # the partial path is the shortest unique name of the node
+        elif full_name.endswith('|' + node) and \
+                node.endswith(path.partialPathName()):
+            return True
+    return False
+
+
+def _cache_node(node, mobject):
+    """
+    Cache a resolved node, the least recently used names are dropped
+    once the cache is full
+
+    :param node: str. maya node
+    :param mobject: MObject. resolved maya node
+    """
+    _HANDLE_CACHE[node] = om.MObjectHandle(mobject)
+    while len(_HANDLE_CACHE) > CACHE_SIZE:
+        _HANDLE_CACHE.popitem(last=False)
+
+
+def get_derived_types(type_name):
+    """
+    Get the node type and all the node types inherited from it,
+    the result is cached as node type inheritance doesn't change in a session
+
+    :param type_name: str. maya node type
+    :return: frozenset. node type names
+    """
+    if type_name not in _DERIVED_TYPES:
+        derived = cmds.nodeType(type_name, derived=1, isTypeName=1) or list()
+        _DERIVED_TYPES[type_name] = frozenset(derived) | {type_name}
+    return _DERIVED_TYPES[type_name]
+
+
+def is_type(mobject, type_name):
+    """
+    Check if a node is of a type, including inherited types
+
+    :param mobject: MObject. maya node
+    :param type_name: str. maya node type
+    :return: bool. whether the node is of the type
+    """
+    mfn_type = MFN_TYPES.get(type_name)
+    if mfn_type is not None:
+        return mobject.hasFn(mfn_type)
+    return om.MFnDependencyNode(mobject).typeName in get_derived_types(type_name)
+
+
+def has_connection_of_type(mobject, type_name):
+    """
+    Check if a node is connected to any node of a type, in either direction
+
+    :param mobject: MObject. maya node
+    :param type_name: str. maya node type of the connected node
+    :return: bool. whether such connection exists
+    """
+    for plug in om.MFnDependencyNode(mobject).getConnections():
+        for other in plug.connectedTo(True, True):
+            if is_type(other.node(), type_name):
+                return True
+    return False
+
+
+def iter_dag_paths(root, type_name=None, include_root=0):
+    """
+    Iterate the DAG paths under a root in depth first order without recursion
+
+    Common node types are filtered by the iterator itself, other types are
+    compared against the derived type names of the specified type
+
+    :param root: MDagPath. root Dag path
+    :param type_name: str. only yield node of this type (including inherited)
+    :param include_root: bool. whether to yield the root itself
+    :return: generator. MDagPath of each node under the root
+    """
+    mfn_type = MFN_TYPES.get(type_name, om.MFn.kInvalid)
+    type_names = None
+    if type_name and mfn_type == om.MFn.kInvalid:
+        type_names = get_derived_types(type_name)
+
+    dag_iter = om.MItDag()
+    dag_iter.reset(root, om.MItDag.kDepthFirst, mfn_type)
+    while not dag_iter.isDone():
+        path = dag_iter.getPath()
+        if (include_root or path != root) and (
+                type_names is None or
+                om.MFnDagNode(path).typeName in type_names):
+            yield path
+        dag_iter.next()
 
 
 def print_dag_children(dg_path):
     """
     Debug all the children's Dag path
-    
+
     :param dg_path: MDagPath. parent Dag path
     """
-    dag_iter = om.MItDag(om.MItDag.kBreadthFirst)
-    dag_iter.reset(dg_path)
-    while not dag_iter.isDone():
-        path = om.MDagPath()
-        dag_iter.getPath(path)
+    for path in iter_dag_paths(dg_path, include_root=1):
         print(path.fullPathName())
-        dag_iter.next()
 
 
-def get_dag_node(node=None):
+def get_node_name(mobject):
     """
-    Get Dependency Graph Node of the specified maya node
+    Get the name of a maya node, DAG nodes use their partial path name
 
-    :param node: str. maya node
-    :return: MObject. MObject of the maya node
+    :param mobject: MObject. maya node
+    :return: str. node name
     """
-    selection = om.MSelectionList()
-    selection.add(node)
-    mobject = om.MObject()
-    selection.getDependNode(0, mobject)
-    return mobject
+    if mobject.hasFn(om.MFn.kDagNode):
+        return om.MFnDagNode(mobject).partialPathName()
+    return om.MFnDependencyNode(mobject).name()
 
 
-def traverse_dg_node_type(mobject, direction, typ):
+def iter_dg(
+        root,
+        direction=om.MItDependencyGraph.kUpstream,
+        types=None,
+        plug_level=0,
+        max_depth=None,
+        prune=None,
+        breadth_first=0,
+        include_root=0):
     """
-    Get all DG node of type by traversing the node network
+    Iterate the nodes of the dependency graph from a root
 
-    :param mobject: MObject. maya DG node to traverse
+    :param root: MObject or MPlug. maya node or plug to traverse from
     :param direction: MItDependencyGraph.Direction. traversal direction
-    :param typ: MFn.Type. type of the DG node
-    :return: list. all DG node of type
+    :param types: list. MFn.Type, yield nodes matching any of them
+    :param plug_level: bool. follow plug connections instead of node level
+    :param max_depth: int. stop traversing beyond this many connections
+    :param prune: function. takes a MObject, return True to stop traversing
+                  beyond the node (the node itself is still yielded)
+    :param breadth_first: bool. breadth first instead of depth first
+    :param include_root: bool. whether to yield the root itself
+    :return: generator. MObjectHandle of each matching node
     """
-    # Create a dependency graph iterator for our current object
-    # this could also be plug level
-    dag_iter = om.MItDependencyGraph(
-        mobject,
+    dg_iter = om.MItDependencyGraph(
+        root,
+        om.MFn.kInvalid,
         direction,
-        om.MItDependencyGraph.kNodeLevel
+        om.MItDependencyGraph.kBreadthFirst if breadth_first
+        else om.MItDependencyGraph.kDepthFirst,
+        om.MItDependencyGraph.kPlugLevel if plug_level
+        else om.MItDependencyGraph.kNodeLevel
     )
 
-    # find the first match type
-    names = list()
-    while not dag_iter.isDone():
-        current = dag_iter.currentItem()
-        node_funcs = om.MFnDependencyNode(current)
-        if current.hasFn(typ):
-            name = node_funcs.name()
-            names.append(name)
+    is_root = 1
+    while not dg_iter.isDone():
+        current = dg_iter.currentNode()
+        if (include_root or not is_root) and (
+                not types or any(current.hasFn(typ) for typ in types)):
+            yield om.MObjectHandle(current)
 
-        dag_iter.next()
+        if not is_root:
+            if prune and prune(current):
+                dg_iter.prune()
+            elif max_depth is not None and \
+                    len(dg_iter.getNodePath()) > max_depth:
+                dg_iter.prune()
+        is_root = 0
+        dg_iter.next()
+
+
+def get_upstream_nodes(mobject, types=None, max_depth=None):
+    """
+    Get all upstream nodes of a root, memoized until connections change
 
-    return names
+    :param mobject: MObject. maya node to traverse from
+    :param types: list. MFn.Type, only get nodes matching any of them
+    :param max_depth: int. stop traversing beyond this many connections
+    :return: list. MObjectHandle of upstream nodes
+    """
+    return _get_connected_nodes(
+        mobject, om.MItDependencyGraph.kUpstream, types, max_depth)
+
+
+def get_downstream_nodes(mobject, types=None, max_depth=None):
+    """
+    Get all downstream nodes of a root, memoized until connections change
+
+    :param mobject: MObject. maya node to traverse from
+    :param types: list. MFn.Type, only get nodes matching any of them
+    :param max_depth: int. stop traversing beyond this many connections
+    :return: list. MObjectHandle of downstream nodes
+    """
+    return _get_connected_nodes(
+        mobject, om.MItDependencyGraph.kDownstream, types, max_depth)
+
+
+def clear_traversal_cache(*args):
+    """
+    Clear memoized upstream/downstream nodes
+    """
+    _TRAVERSAL_CACHE.clear()
+
+
+def _get_connected_nodes(mobject, direction, types, max_depth):
+    """
+    Get memoized nodes connected to a root in one direction
+
+    :param mobject: MObject. maya node to traverse from
+    :param direction: MItDependencyGraph.Direction. traversal direction
+    :param types: list. MFn.Type, only get nodes matching any of them
+    :param max_depth: int. stop traversing beyond this many connections
+    :return: list. MObjectHandle of connected nodes
+    """
+    if not _TRAVERSAL_CALLBACKS:
+        _TRAVERSAL_CALLBACKS.extend([
+            om.MDGMessage.addConnectionCallback(clear_traversal_cache),
+            om.MDGMessage.addNodeRemovedCallback(clear_traversal_cache),
+            om.MSceneMessage.addCallback(
+                om.MSceneMessage.kAfterOpen, clear_traversal_cache),
+            om.MSceneMessage.addCallback(
+                om.MSceneMessage.kAfterNew, clear_traversal_cache),
+        ])
+
+    key = (
+        om.MObjectHandle(mobject).hashCode(),
+        direction,
+        tuple(types or ()),
+        max_depth
+    )
+    handles = _TRAVERSAL_CACHE.get(key)
+    if handles is None or not all(handle.isValid() for handle in handles):
+        handles = list(iter_dg(
+            mobject, direction, types=types, max_depth=max_depth))
+        _TRAVERSAL_CACHE[key] = handles
+
+    return handles
+
+
+def traverse_dg_node_type(mobject, direction, typ):
+    """
+    Get all DG node of type by traversing the node network
+
+    :param mobject: MObject. maya DG node to traverse
+    :param direction: MItDependencyGraph.Direction. traversal direction
+    :param typ: MFn.Type. type of the DG node
+    :return: list. all DG node of type
+    """
+    return [
+        om.MFnDependencyNode(handle.object()).name()
+        for handle in iter_dg(mobject, direction, [typ], include_root=1)
+    ]
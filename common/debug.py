@@ -1,5 +1,7 @@
 import maya.cmds as cmds
 
+from . import schema
+
 
 def pprint_attr_shortname(mobject):
     """
@@ -7,14 +9,8 @@ def pprint_attr_shortname(mobject):
 
     :param mobject: str. maya node
     """
-    longs = [i for i in cmds.listAttr(mobject)]
-    shorts = [i for i in cmds.listAttr(mobject, sn=1)]
-
-    if len(longs) != len(shorts):
-        return
-
-    for i in range(len(longs)):
-        print('{}: {}'.format(longs[i], shorts[i]))
+    for attr in schema.get_attrs(mobject, resolve=0):
+        print('{}: {}'.format(attr.long, attr.short))
 
 
 def get_loaded_plugins(is_auto=False):
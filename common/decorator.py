@@ -27,6 +27,20 @@ def undo_actions(func):
     return _undofunc
 
 
+def undo_chunk(func):
+    """
+    Wrap series of maya actions into a single undo step
+    """
+    @wraps(func)
+    def wrap(*args, **kwargs):
+        cmds.undoInfo(openChunk=1)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            cmds.undoInfo(closeChunk=1)
+    return wrap
+
+
 def viewport_off(func):
     """
     Turn off maya viewport display
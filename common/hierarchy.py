@@ -1,4 +1,10 @@
+from collections import OrderedDict
+
 import maya.cmds as cmds
+from maya.api import OpenMaya as om
+
+from . import dag, index
+from .decorator import undo_chunk
 
 
 def get_root_node(obj, type_specified=None):
@@ -9,6 +15,10 @@ def get_root_node(obj, type_specified=None):
     :param type_specified: str. restrict the root node type
     :return: str. the root scene object
     """
+    scene_index = index.get_index()
+    if scene_index is not None:
+        return scene_index.get_root(obj, type_specified)
+
     root = None
 
     # check current node
@@ -32,6 +42,25 @@ def get_root_node(obj, type_specified=None):
     return root
 
 
+def iter_hierarchy(root, type_specified=None):
+    """
+    Iterate all children in the hierarchy of a root (excluding the root),
+    the hierarchy is walked by a single DAG iterator instead of recursion
+
+    :param root: str. single scene object
+    :param type_specified: str. restrict the children type
+    :return: generator. children and grand children of the root
+    """
+    scene_index = index.get_index()
+    if scene_index is not None:
+        for child in scene_index.iter_descendants(root, type_specified):
+            yield child
+        return
+
+    for path in dag.iter_dag_paths(dag.get_dag_path(root), type_specified):
+        yield path.partialPathName()
+
+
 def get_all_under_hierarchy(root):
     """
     Get all children in the hierarchy of a root (excluding the root)
@@ -39,13 +68,7 @@ def get_all_under_hierarchy(root):
     :param root: str. single scene object
     :return: list. children and grand children of the root
     """
-    children = list()
-    direct_children = cmds.listRelatives(root, children=1)
-    if direct_children:
-        children.extend(direct_children)
-        for child in direct_children:
-            children.extend(get_all_under_hierarchy(child))
-    return children
+    return list(iter_hierarchy(root))
 
 
 def get_hierarchy_of_type(root, type_specified):
@@ -56,74 +79,135 @@ def get_hierarchy_of_type(root, type_specified):
     :param type_specified: str. object type
     :return: list. object of the specified type
     """
-    children = get_all_under_hierarchy(root)
-    return cmds.ls(children, type=type_specified)
+    return list(iter_hierarchy(root, type_specified))
 
 
-# TODO: combine the following two functions into one
-def delete_hierarchy_except_type(roots, type_specified):
+def plan_hierarchy_delete(roots, predicate):
     """
-    Delete all other types of objects under hierarchy of root
-    note: the function cannot re-parent shape node to another transform
-    but since it is always on top, it is safe to delete before hand
+    Plan the removal of every node under the hierarchy of roots that fails
+    the predicate, in a single traversal.
+    Children of removed nodes go to their nearest kept ancestor (or the
+    original parent of the root); shape nodes cannot be re-parented to
+    another transform, so they are removed along with their transform
 
     :param roots: list or str. scene obj
-    :param type_specified: str. object type
+    :param predicate: function. takes a MObject, return True to keep the node
+    :return: tuple. list of (child MObject, new parent MObject or None)
+             to re-parent and list of MObject to delete
     """
     if not isinstance(roots, list):
         roots = [roots]
 
-    for root_obj in roots:
-        children = cmds.listRelatives(root_obj, children=1)
-        if not children:
-            # the current object is at top
-            if not cmds.objectType(root_obj, isType=type_specified):
-                cmds.delete(root_obj)
+    reparents = list()
+    deletes = list()
+    for root in roots:
+        root_path = dag.get_dag_path(root)
+        parent_path = om.MDagPath(root_path)
+        parent_path.pop()
+        parent = parent_path.node() if parent_path.length() else None
+
+        # stack item: path, nearest kept ancestor, whether parent is removed
+        stack = [(root_path, parent, 0)]
+        while stack:
+            path, target, is_orphan = stack.pop()
+            mobject = path.node()
+            is_kept = predicate(mobject)
+
+            if mobject.hasFn(om.MFn.kShape):
+                if not is_kept and not is_orphan:
+                    deletes.append(mobject)
+                continue
+
+            if is_kept:
+                if is_orphan:
+                    reparents.append((mobject, target))
+                target = mobject
+            elif not is_orphan:
+                # removed nodes under a removed parent go with the parent
+                deletes.append(mobject)
+
+            for i in reversed(range(path.childCount())):
+                child_path = om.MDagPath(path)
+                child_path.push(path.child(i))
+                stack.append((child_path, target, not is_kept))
+
+    return reparents, deletes
+
+
+@undo_chunk
+def delete_hierarchy(roots, predicate, dry_run=0):
+    """
+    Delete all objects that fail the predicate under the hierarchy of roots,
+    the plan is applied as a single undo step with one cmds.parent call per
+    new parent and one cmds.delete call
+
+    :param roots: list or str. scene obj
+    :param predicate: function. takes a MObject, return True to keep the node
+    :param dry_run: bool. only return the plan without modifying the scene
+    :return: dict. 'reparent': list of (child, new parent or None) names,
+             'delete': list of deleted node names
+    """
+    reparents, deletes = plan_hierarchy_delete(roots, predicate)
+    plan = {
+        'reparent': [
+            (dag.get_node_name(child),
+             dag.get_node_name(parent) if parent else None)
+            for child, parent in reparents
+        ],
+        'delete': [dag.get_node_name(mobject) for mobject in deletes],
+    }
+    if dry_run:
+        return plan
+
+    groups = OrderedDict()
+    for child, parent in reparents:
+        key = om.MObjectHandle(parent).hashCode() if parent else None
+        groups.setdefault(key, (parent, list()))[1].append(child)
+
+    # names are resolved when applied, re-parenting can change the paths
+    for parent, children in groups.values():
+        names = [dag.get_node_name(child) for child in children]
+        if parent is None:
+            cmds.parent(names, world=1)
         else:
-            # the current object has children
-            for child in children:
-                # the child is not top object or different type, re-parent
-                if not cmds.objectType(root_obj, isType=type_specified):
-                    cmds.parent(child, cmds.listRelatives(root_obj, parent=1))
-                delete_hierarchy_except_type(child, type_specified)
+            cmds.parent(names, dag.get_node_name(parent))
+    if deletes:
+        cmds.delete([dag.get_node_name(mobject) for mobject in deletes])
 
-            # children moved under another parent, delete original parent
-            if not cmds.objectType(root_obj, isType=type_specified):
-                cmds.delete(root_obj)
+    return plan
 
 
-def delete_hierarchy_except_node(roots, type_specified):
+def delete_hierarchy_except_type(roots, type_specified, dry_run=0):
     """
     Delete all other types of objects under hierarchy of root
-    note: the function cannot re-parent shape node to another transform
-    but since it is always on top, it is safe to delete before hand
 
     :param roots: list or str. scene obj
     :param type_specified: str. object type
+    :param dry_run: bool. only return the plan without modifying the scene
+    :return: dict. re-parent and delete plan, see delete_hierarchy()
     """
-    if not isinstance(roots, list):
-        roots = [roots]
+    return delete_hierarchy(
+        roots,
+        lambda mobject: dag.is_type(mobject, type_specified),
+        dry_run
+    )
 
-    for root_obj in roots:
-        children = cmds.listRelatives(root_obj, children=1)
-        if not children:
-            # the current object is the top object
-            if not cmds.listConnections(root_obj, type=type_specified):
-                cmds.delete(root_obj)
-        else:
-            # the current object has children
-            for child in children:
-                # the child is not top object or different type, re-parent
-                if not cmds.listConnections(root_obj, type=type_specified):
-                    cmds.parent(
-                        child,
-                        cmds.listRelatives(root_obj, parent=1)
-                    )
-                delete_hierarchy_except_node(child, type_specified)
 
-            # children moved under another parent, delete original parent
-            if not cmds.listConnections(root_obj, type=type_specified):
-                cmds.delete(root_obj)
+def delete_hierarchy_except_node(roots, type_specified, dry_run=0):
+    """
+    Delete all objects under hierarchy of root which are not connected to
+    a node of certain type
+
+    :param roots: list or str. scene obj
+    :param type_specified: str. type of the connected node
+    :param dry_run: bool. only return the plan without modifying the scene
+    :return: dict. re-parent and delete plan, see delete_hierarchy()
+    """
+    return delete_hierarchy(
+        roots,
+        lambda mobject: dag.has_connection_of_type(mobject, type_specified),
+        dry_run
+    )
 
 
 def delete_hierarchy_shape(roots):
@@ -136,12 +220,32 @@ def delete_hierarchy_shape(roots):
         roots = [roots]
 
     for root in roots:
-        nodes = cmds.listRelatives(root, ad=1)
-        shapes = cmds.ls(nodes, shapes=1)
+        shapes = get_hierarchy_of_type(root, 'shape')
         if shapes:
             cmds.delete(shapes)
 
 
+def get_shapes_from_xforms(transforms, enable_result_only=1):
+    """
+    Get shape nodes under many transforms in one pass
+
+    :param transforms: list. scene objects
+    :param enable_result_only: bool. skip intermediate shapes (e.g. 'Orig')
+    :return: OrderedDict. transform: list of its shape nodes
+    """
+    shapes = OrderedDict()
+    for transform, path in zip(transforms, dag.get_dag_paths(transforms)):
+        shapes[transform] = list()
+        for i in range(path.numberOfShapesDirectlyBelow()):
+            shape_path = om.MDagPath(path)
+            shape_path.extendToShape(i)
+            if enable_result_only and \
+                    om.MFnDagNode(shape_path).isIntermediateObject:
+                continue
+            shapes[transform].append(shape_path.partialPathName())
+    return shapes
+
+
 def get_shape_from_xform(
         transform,
         enable_result_only=1,
@@ -154,8 +258,7 @@ def get_shape_from_xform(
     :param check_unique_child: bool. check if transform has multiple shapes
     :return: list. the shape node
     """
-    shapes = cmds.listRelatives(transform, shapes=1)
-    shapes_result = [shape for shape in shapes if 'Orig' not in shape]
+    shapes_result = get_shapes_from_xforms([transform])[transform]
 
     if check_unique_child:
         assert len(shapes_result) != 0, "no shape node found"
@@ -168,29 +271,56 @@ def get_shape_from_xform(
     if enable_result_only:
         return shapes_result
     else:
-        return shapes
+        return get_shapes_from_xforms([transform], 0)[transform]
 
 
-def batch_parent(obj_list, parent):
+@undo_chunk
+def batch_reparent(pairs, relative=0):
+    """
+    Parent objects as a single undo step,
+    children sharing the same parent are parented in one cmds.parent call
+
+    :param pairs: list. (child, parent) pairs, parent None means the world
+    :param relative: bool. keep local transforms instead of world transforms
+    :return: list. new names of the children
+    """
+    groups = OrderedDict()
+    for child, parent in pairs:
+        groups.setdefault(parent, list()).append(child)
+
+    children = list()
+    for parent, group in groups.items():
+        if parent is None:
+            result = cmds.parent(group, world=1, relative=relative)
+        else:
+            result = cmds.parent(group, parent, relative=relative)
+        children.extend(result or list())
+    return children
+
+
+def batch_parent(obj_list, parent, relative=0):
     """
     Grouping multiple objects to the same parent
 
     :param obj_list: list, children objects
     :param parent: str. parent object
+    :param relative: bool. keep local transforms instead of world transforms
+    :return: list. new names of the children
     """
-    for item in obj_list:
-        cmds.parent(item, parent, relative=0)
+    return batch_reparent([(item, parent) for item in obj_list], relative)
 
 
-def hierarchical_parent(obj_list):
+def hierarchical_parent(obj_list, relative=0):
     """
-    Parent the objects in hierarchical order
+    Parent the objects in hierarchical order as a single undo step,
+    every link has its own parent so it still takes one cmds.parent call
+    per link
 
     :param obj_list: objects to parent in order
+    :param relative: bool. keep local transforms instead of world transforms
+    :return: list. new names of the children
     """
-    for index, item in enumerate(obj_list):
-        if obj_list[index] != obj_list[-1]:
-            cmds.parent(obj_list[index], obj_list[index+1])
+    return batch_reparent(list(zip(obj_list[:-1], obj_list[1:])), relative)
 
 
 def get_top_nodes(typ=''):
@@ -200,6 +330,10 @@ def get_top_nodes(typ=''):
     :param typ: str. node type
     :return: [str]. list of top nodes
     """
+    scene_index = index.get_index()
+    if scene_index is not None:
+        return scene_index.get_top_nodes(typ)
+
     top_nodes = cmds.ls(assemblies=True)
     if typ:
         top_nodes = [node for node in top_nodes if cmds.nodeType(node) == typ]
@@ -0,0 +1,332 @@
+"""
+In-memory index of the scene DAG hierarchy
+
+The index stores parent, children and node type of every DAG node keyed by
+MObjectHandle hash code, it is built once and kept up to date through
+DG/DAG message callbacks, so hierarchy queries don't need to go through cmds
+
+Example:
+    index.enable()
+    hierarchy.get_root_node('hand_L_jnt', 'joint')  # answered from the index
+    index.disable()
+"""
+
+import logging
+
+from maya.api import OpenMaya as om
+
+from . import dag
+
+
+logger = logging.getLogger(__name__)
+
+_INDEX = None
+
+
+class HierarchyIndex(object):
+    """
+    Class for the cached DAG hierarchy of the current scene
+    """
+
+    def __init__(self):
+        """
+        Initialization
+        """
+        self._handles = dict()
+        self._types = dict()
+        self._parents = dict()
+        self._children = dict()
+        self._callbacks = list()
+
+    @property
+    def size(self):
+        """
+        :return: int. number of DAG nodes in the index
+        """
+        return len(self._handles)
+
+    @property
+    def is_listening(self):
+        """
+        :return: bool. whether the index is kept up to date by callbacks
+        """
+        return bool(self._callbacks)
+
+    def build(self):
+        """
+        (Re-)build the index from all DAG nodes in the scene
+        """
+        self._handles.clear()
+        self._types.clear()
+        self._parents.clear()
+        self._children.clear()
+
+        node_iter = om.MItDependencyNodes(om.MFn.kDagNode)
+        while not node_iter.isDone():
+            self._add(node_iter.thisNode())
+            node_iter.next()
+
+        for key, parents in self._parents.items():
+            for parent in parents:
+                self._children.setdefault(parent, list()).append(key)
+
+        logger.debug('hierarchy index built with %s nodes', self.size)
+
+    def start(self):
+        """
+        Register the callbacks that keep the index in sync with the scene
+        """
+        if self._callbacks:
+            return
+
+        self._callbacks = [
+            om.MDGMessage.addNodeAddedCallback(self._on_added, 'dagNode'),
+            om.MDGMessage.addNodeRemovedCallback(self._on_removed, 'dagNode'),
+            om.MDagMessage.addParentAddedCallback(self._on_parent_added),
+            om.MDagMessage.addParentRemovedCallback(self._on_parent_removed),
+            om.MSceneMessage.addCallback(
+                om.MSceneMessage.kAfterOpen, self._on_scene_changed),
+            om.MSceneMessage.addCallback(
+                om.MSceneMessage.kAfterNew, self._on_scene_changed),
+        ]
+
+    def stop(self):
+        """
+        Remove the callbacks, the index will no longer be updated
+        """
+        if self._callbacks:
+            om.MMessage.removeCallbacks(self._callbacks)
+        self._callbacks = list()
+
+    def contains(self, node):
+        """
+        Check if the node is in the index
+
+        :param node: str. scene object
+        :return: bool. whether the node is indexed
+        """
+        return self._get_key(node) in self._handles
+
+    def get_type(self, node):
+        """
+        Get the node type
+
+        :param node: str. scene object
+        :return: str. node type
+        """
+        return self._types[self._get_key(node)]
+
+    def get_parent(self, node):
+        """
+        Get the (first) parent of the node
+
+        :param node: str. scene object
+        :return: str. parent name, None if the node is at the top
+        """
+        parents = self._parents[self._get_key(node)]
+        if parents:
+            return self._get_name(parents[0])
+        return None
+
+    def get_children(self, node, type_specified=None):
+        """
+        Get the direct children of the node
+
+        :param node: str. scene object
+        :param type_specified: str. restrict the children type
+        :return: list. children names
+        """
+        return [
+            self._get_name(key)
+            for key in self._children.get(self._get_key(node), list())
+            if not type_specified or self._is_type(key, type_specified)
+        ]
+
+    def get_root(self, node, type_specified=None):
+        """
+        Get the root of the node by walking up its first parents
+
+        :param node: str. scene object
+        :param type_specified: str. restrict the root node type (exact type,
+                               like cmds.objectType(isType=))
+        :return: str. the root scene object
+        """
+        key = self._get_key(node)
+        root = None
+        while key is not None:
+            if not type_specified or self._types[key] == type_specified:
+                root = key
+            parents = self._parents[key]
+            key = parents[0] if parents else None
+
+        if root is None:
+            return None
+        return self._get_name(root)
+
+    def iter_descendants(self, node, type_specified=None):
+        """
+        Iterate all children in the hierarchy of the node (excluding itself)
+
+        :param node: str. scene object
+        :param type_specified: str. restrict the children type
+        :return: generator. children and grand children names
+        """
+        stack = list(reversed(self._children.get(self._get_key(node), list())))
+        while stack:
+            key = stack.pop()
+            if not type_specified or self._is_type(key, type_specified):
+                yield self._get_name(key)
+            stack.extend(reversed(self._children.get(key, list())))
+
+    def get_top_nodes(self, typ=''):
+        """
+        Get top level nodes, optionally of an exact node type
+
+        :param typ: str. node type
+        :return: list. top node names
+        """
+        return [
+            self._get_name(key)
+            for key, parents in self._parents.items()
+            if not parents and (not typ or self._types[key] == typ)
+        ]
+
+    def _get_key(self, node):
+        """
+        Resolve a node name to its index key
+
+        :param node: str. scene object
+        :return: int. MObjectHandle hash code
+        """
+        return om.MObjectHandle(dag.get_dag_path(node).node()).hashCode()
+
+    def _get_name(self, key):
+        """
+        Get the partial path name of an indexed node
+
+        :param key: int. index key
+        :return: str. node name
+        """
+        return om.MFnDagNode(self._handles[key].object()).partialPathName()
+
+    def _is_type(self, key, type_name):
+        """
+        Check if an indexed node is of a type (including inherited types)
+
+        :param key: int. index key
+        :param type_name: str. node type
+        :return: bool. whether the node is of the type
+        """
+        if type_name in dag.MFN_TYPES:
+            return dag.is_type(self._handles[key].object(), type_name)
+        return self._types[key] in dag.get_derived_types(type_name)
+
+    def _add(self, mobject):
+        """
+        Add a single node to the index without updating children
+
+        :param mobject: MObject. DAG node
+        :return: int. index key
+        """
+        handle = om.MObjectHandle(mobject)
+        key = handle.hashCode()
+        fn_dag = om.MFnDagNode(mobject)
+
+        self._handles[key] = handle
+        self._types[key] = fn_dag.typeName
+        parents = [fn_dag.parent(i) for i in range(fn_dag.parentCount())]
+        self._parents[key] = [
+            om.MObjectHandle(parent).hashCode()
+            for parent in parents
+            if not parent.hasFn(om.MFn.kWorld)
+        ]
+        return key
+
+    def _link(self, child, parent):
+        """
+        Register a parent-child relationship between two indexed nodes
+        """
+        if parent not in self._parents.setdefault(child, list()):
+            self._parents[child].append(parent)
+        children = self._children.setdefault(parent, list())
+        if child not in children:
+            children.append(child)
+
+    def _unlink(self, child, parent):
+        """
+        Remove a parent-child relationship between two indexed nodes
+        """
+        if parent in self._parents.get(child, list()):
+            self._parents[child].remove(parent)
+        if child in self._children.get(parent, list()):
+            self._children[parent].remove(child)
+
+    def _on_added(self, mobject, *args):
+        key = self._add(mobject)
+        for parent in self._parents[key]:
+            if parent in self._handles:
+                self._children.setdefault(parent, list()).append(key)
+
+    def _on_removed(self, mobject, *args):
+        key = om.MObjectHandle(mobject).hashCode()
+        for parent in self._parents.pop(key, list()):
+            if key in self._children.get(parent, list()):
+                self._children[parent].remove(key)
+        for child in self._children.pop(key, list()):
+            if key in self._parents.get(child, list()):
+                self._parents[child].remove(key)
+        self._handles.pop(key, None)
+        self._types.pop(key, None)
+
+    def _on_parent_added(self, child, parent, *args):
+        if parent.node().hasFn(om.MFn.kWorld):
+            return
+        self._link(
+            om.MObjectHandle(child.node()).hashCode(),
+            om.MObjectHandle(parent.node()).hashCode()
+        )
+
+    def _on_parent_removed(self, child, parent, *args):
+        if parent.node().hasFn(om.MFn.kWorld):
+            return
+        self._unlink(
+            om.MObjectHandle(child.node()).hashCode(),
+            om.MObjectHandle(parent.node()).hashCode()
+        )
+
+    def _on_scene_changed(self, *args):
+        self.build()
+
+
+def enable():
+    """
+    Build the scene hierarchy index and keep it updated,
+    hierarchy queries will be answered from the index while enabled
+
+    :return: HierarchyIndex. the active index
+    """
+    global _INDEX
+    if _INDEX is None:
+        _INDEX = HierarchyIndex()
+        _INDEX.build()
+        _INDEX.start()
+    return _INDEX
+
+
+def disable():
+    """
+    Stop and discard the active scene hierarchy index
+    """
+    global _INDEX
+    if _INDEX is not None:
+        _INDEX.stop()
+    _INDEX = None
+
+
+def get_index():
+    """
+    Get the active scene hierarchy index
+
+    :return: HierarchyIndex. the active index, None if not enabled
+    """
+    return _INDEX
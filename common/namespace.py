@@ -0,0 +1,247 @@
+"""
+Bulk namespace operations
+
+The namespace tree of the scene is built once (one namespace query and one
+node listing) and used to order operations on whole namespace sets, so that
+child namespaces are removed before their parents and renamed after them
+
+Example:
+    tree = namespace.NamespaceTree.from_scene()
+    tree.get_member_counts()
+    namespace.remove_namespaces(tree.get_children(':', recursive=1), tree)
+"""
+
+import maya.cmds as cmds
+
+from .decorator import undo_chunk
+
+
+ROOT = ':'
+
+# namespaces maya creates by default that can't be modified
+DEFAULT_NAMESPACES = ('UI', 'shared')
+
+
+class NamespaceTree(object):
+    """
+    Class for a snapshot of the scene namespace hierarchy and member counts
+    """
+
+    def __init__(self, namespaces, nodes):
+        """
+        Initialization
+
+        :param namespaces: list. full namespace names
+        :param nodes: list. scene node names
+        """
+        self._children = {ROOT: list()}
+        self._counts = dict()
+
+        for namespace in sorted(namespaces, key=lambda ns: ns.count(':')):
+            namespace = namespace.strip(':')
+            if namespace in DEFAULT_NAMESPACES:
+                continue
+            self._children.setdefault(namespace, list())
+            self._children.setdefault(get_parent(namespace), list()).append(
+                namespace)
+
+        for node in nodes:
+            namespace = node.rsplit('|', 1)[-1].rpartition(':')[0] or ROOT
+            self._counts[namespace] = self._counts.get(namespace, 0) + 1
+
+    @classmethod
+    def from_scene(cls):
+        """
+        Build the namespace tree from the current scene
+
+        :return: NamespaceTree.
+        """
+        namespaces = cmds.namespaceInfo(
+            ROOT,
+            listOnlyNamespaces=1,
+            recurse=1
+        ) or list()
+        return cls(namespaces, cmds.ls())
+
+    def __contains__(self, namespace):
+        return namespace.strip(':') in self._children
+
+    @property
+    def namespaces(self):
+        """
+        :return: list. all namespaces (excluding root), children first
+        """
+        return sort_children_first(
+            [ns for ns in self._children if ns != ROOT]
+        )
+
+    def get_children(self, namespace, recursive=0):
+        """
+        Get child namespaces
+
+        :param namespace: str. parent namespace, ':' for root
+        :param recursive: bool. include all nested namespaces
+        :return: list. child namespaces
+        """
+        namespace = namespace.strip(':') or ROOT
+        children = list(self._children.get(namespace, list()))
+        if recursive:
+            index = 0
+            while index < len(children):
+                children.extend(self._children.get(children[index], list()))
+                index += 1
+        return children
+
+    def get_member_count(self, namespace, recursive=0):
+        """
+        Get the number of nodes in a namespace
+
+        :param namespace: str. namespace, ':' for root
+        :param recursive: bool. include nodes of nested namespaces
+        :return: int. node count
+        """
+        namespace = namespace.strip(':') or ROOT
+        count = self._counts.get(namespace, 0)
+        if recursive:
+            count += sum(
+                self._counts.get(child, 0)
+                for child in self.get_children(namespace, recursive=1)
+            )
+        return count
+
+    def get_member_counts(self):
+        """
+        Get the number of nodes directly in each namespace
+
+        :return: dict. namespace: node count
+        """
+        return dict(
+            (namespace, self._counts.get(namespace, 0))
+            for namespace in self._children
+        )
+
+
+def get_parent(namespace):
+    """
+    Get the parent of a namespace
+
+    :param namespace: str. full namespace name
+    :return: str. parent namespace, ':' for root
+    """
+    return namespace.strip(':').rpartition(':')[0] or ROOT
+
+
+def sort_children_first(namespaces):
+    """
+    Sort namespaces so nested namespaces come before their parents
+
+    :param namespaces: list. full namespace names
+    :return: list. sorted namespaces
+    """
+    return sorted(
+        set(ns.strip(':') for ns in namespaces),
+        key=lambda ns: ns.count(':'),
+        reverse=1
+    )
+
+
+def _expand(namespaces, tree, recursive):
+    """
+    Validate namespaces against the tree and optionally add nested ones
+
+    :param namespaces: list. full namespace names
+    :param tree: NamespaceTree. namespace tree of the scene
+    :param recursive: bool. include all nested namespaces
+    :return: list. namespaces sorted children first
+    """
+    expanded = list()
+    for namespace in namespaces:
+        if namespace not in tree:
+            raise ValueError('namespace {} not found'.format(namespace))
+        expanded.append(namespace)
+        if recursive:
+            expanded.extend(tree.get_children(namespace, recursive=1))
+    return sort_children_first(expanded)
+
+
+@undo_chunk
+def remove_namespaces(
+        namespaces,
+        tree=None,
+        recursive=0,
+        delete_content=0):
+    """
+    Remove namespaces in one undo step, nested namespaces are removed first,
+    their content is merged with the root unless deleted
+
+    :param namespaces: list. full namespace names
+    :param tree: NamespaceTree. namespace tree, built from scene if not given
+    :param recursive: bool. also remove all nested namespaces
+    :param delete_content: bool. delete the nodes instead of merging them
+    :return: list. removed namespaces in removal order
+    """
+    if tree is None:
+        tree = NamespaceTree.from_scene()
+
+    removed = _expand(namespaces, tree, recursive)
+    for namespace in removed:
+        if delete_content:
+            cmds.namespace(removeNamespace=namespace, deleteNamespaceContent=1)
+        else:
+            cmds.namespace(removeNamespace=namespace, mergeNamespaceWithRoot=1)
+    return removed
+
+
+@undo_chunk
+def merge_namespaces(namespaces, tree=None, recursive=0):
+    """
+    Merge namespaces into their parent in one undo step,
+    nested namespaces are merged first
+
+    :param namespaces: list. full namespace names
+    :param tree: NamespaceTree. namespace tree, built from scene if not given
+    :param recursive: bool. also merge all nested namespaces
+    :return: list. merged namespaces in merging order
+    """
+    if tree is None:
+        tree = NamespaceTree.from_scene()
+
+    merged = _expand(namespaces, tree, recursive)
+    for namespace in merged:
+        cmds.namespace(removeNamespace=namespace, mergeNamespaceWithParent=1)
+    return merged
+
+
+@undo_chunk
+def rename_namespaces(mapping, tree=None):
+    """
+    Rename (and re-parent) namespaces in one undo step,
+    parent namespaces are renamed first and nested namespaces are found
+    under the new name of their renamed parent
+
+    :param mapping: dict. full namespace name: new full namespace name
+    :param tree: NamespaceTree. namespace tree, built from scene if not given
+    :return: list. renamed namespaces in renaming order
+    """
+    if tree is None:
+        tree = NamespaceTree.from_scene()
+
+    renamed = list(reversed(_expand(list(mapping), tree, 0)))
+    # new names of the namespaces renamed so far
+    new_names = dict()
+    for namespace in renamed:
+        new_namespace = mapping.get(namespace) or mapping[':' + namespace]
+        current = namespace
+        parent = get_parent(namespace)
+        while parent != ROOT:
+            if parent in new_names:
+                current = new_names[parent] + namespace[len(parent):]
+                break
+            parent = get_parent(parent)
+
+        cmds.namespace(
+            rename=(':' + current, new_namespace.rpartition(':')[-1]),
+            parent=':' + get_parent(new_namespace).strip(':')
+        )
+        new_names[namespace] = new_namespace.strip(':')
+    return renamed
@@ -3,39 +3,101 @@ import re
 
 import maya.cmds as cmds
 
+from . import namespace
+from .decorator import undo_chunk
+
+
+def get_name_index(nodes=None):
+    """
+    Build a short name index of scene objects
+
+    :param nodes: list. long names of the objects, defaults to the whole scene
+    :return: dict. short name: list of long names sharing the short name
+    """
+    if nodes is None:
+        nodes = cmds.ls(long=1)
+
+    name_index = dict()
+    for node in nodes:
+        name_index.setdefault(node.rsplit('|', 1)[-1], list()).append(node)
+    return name_index
+
+
+def resolve_duplicates(enable_rename=1, name_index=None):
+    """
+    Compute a unique name for every duplicated short name in the scene and
+    rename them all at once, the shallowest object of each name is kept
+
+    :param enable_rename: bool. apply the renames, otherwise only plan them
+    :param name_index: dict. short name index, see get_name_index()
+    :return: dict. long name before rename: new short name
+    """
+    if name_index is None:
+        name_index = get_name_index()
+
+    used_names = set(name_index)
+    counters = dict()
+    renames = list()
+    for short_name, long_names in name_index.items():
+        if len(long_names) < 2:
+            continue
+
+        # extract the numeric suffix
+        match_suffix = re.compile(".*[^0-9]").match(short_name)
+        if match_suffix:
+            suffix = match_suffix.group(0)
+        else:
+            suffix = short_name
+
+        # keep the shallowest one, rename the rest
+        long_names = sorted(long_names, key=lambda obj: obj.count('|'))
+        for long_name in long_names[1:]:
+            number = counters.get(suffix, 1)
+            while '{}{}'.format(suffix, number) in used_names:
+                number += 1
+            counters[suffix] = number + 1
+
+            new_name = '{}{}'.format(suffix, number)
+            used_names.add(new_name)
+            renames.append((long_name, new_name))
+
+    # Sort them by hierarchy so no parent is renamed before a child.
+    renames.sort(key=lambda rename: rename[0].count('|'), reverse=1)
+
+    if enable_rename:
+        return _apply_renames(renames)
+    return dict(renames)
+
+
+@undo_chunk
+def _apply_renames(renames):
+    """
+    Rename objects in the given order as a single undo step
+
+    :param renames: list. (long name, new short name) pairs
+    :return: dict. long name before rename: actual new short name
+    """
+    rename_map = dict()
+    for long_name, new_name in renames:
+        rename_map[long_name] = cmds.rename(long_name, new_name)
+        logging.info("renamed %s to %s", long_name, rename_map[long_name])
+    return rename_map
+
 
 def check_duplicates(enable_rename=1):
     """
     Find all duplicated short names in scene and rename them
 
     :param enable_rename: bool, rename duplicated names
+    :return: dict. long name before rename: new short name
     """
-    # Find all objects that have the same short name as another by find '|'
-    duplicates = [f for f in cmds.ls() if '|' in f]
-    # Sort them by hierarchy so no parent is renamed before a child.
-    duplicates.sort(key=lambda obj: obj.count('|'), reverse=1)
+    rename_map = resolve_duplicates(enable_rename)
 
-    if not duplicates:
+    if not rename_map:
         logging.info("No Duplicates")
-    else:
-        if enable_rename:
-            name = duplicates[0]
-            match_short = re.compile("[^|]*$").search(name)
-            short_name = match_short.group(0)
-
-            # extract the numeric suffix
-            match_suffix = re.compile(".*[^0-9]").match(short_name)
-            if match_suffix:
-                suffix = match_suffix.group(0)
-            else:
-                suffix = short_name
-
-            # add '#' as the suffix, maya will find the next available number
-            new_name = cmds.rename(name, '{}#'.format(suffix))
-            logging.info("renamed %s to %s", name, new_name)
-            check_duplicates(enable_rename=1)
-        else:
-            logging.info("Found Duplicates")
+    elif not enable_rename:
+        logging.info("Found Duplicates")
+    return rename_map
 
 
 def is_name_unique(obj):
@@ -57,19 +119,59 @@ def is_name_unique(obj):
         return 1
 
 
-def remove_namespace(node):
+def are_names_unique(objs, name_index=None):
+    """
+    Check if the objects' short names are unique in the scene,
+    answered from a single short name index
+
+    :param objs: list. scene objects
+    :param name_index: dict. short name index, see get_name_index()
+    :return: dict. object: whether the object name is unique or not
+    """
+    if name_index is None:
+        name_index = get_name_index()
+
+    return dict(
+        (obj, int(len(name_index.get(obj.rsplit('|', 1)[-1], list())) <= 1))
+        for obj in objs
+    )
+
+
+def remove_namespace(node, tree=None):
     """
     Remove the top namespace of the node
 
     :param node: str. node name
+    :param tree: NamespaceTree. namespace tree, built from scene if not given
     :return: str. new node name without top namespace
     """
-    if ':' not in node:
-        return node
+    return remove_namespaces([node], tree)[0]
+
 
-    namespace, new_name = node.split(':', 1)
-    if namespace not in cmds.namespaceInfo(listOnlyNamespaces=1):
-        raise ValueError('namespace not found')
-    cmds.namespace(removeNamespace=namespace, mergeNamespaceWithRoot=1)
+def remove_namespaces(nodes, tree=None):
+    """
+    Remove the top namespaces of many nodes in one operation
 
-    return new_name
+    :param nodes: list. node names
+    :param tree: NamespaceTree. namespace tree, built from scene if not given
+    :return: list. new node names without top namespace
+    """
+    if tree is None:
+        tree = namespace.NamespaceTree.from_scene()
+
+    top_namespaces = set()
+    new_names = list()
+    for node in nodes:
+        if ':' not in node:
+            new_names.append(node)
+            continue
+
+        top_namespace, new_name = node.split(':', 1)
+        if top_namespace not in tree:
+            raise ValueError('namespace not found')
+        top_namespaces.add(top_namespace)
+        new_names.append(new_name)
+
+    if top_namespaces:
+        namespace.remove_namespaces(list(top_namespaces), tree)
+    return new_names
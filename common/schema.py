@@ -0,0 +1,220 @@
+"""
+Per node type attribute schema cache
+
+Static attributes are a property of the node type, so their long name,
+short name and definition (keyable and channel box flags, type and default
+value) are queried once per node type and shared by every node of that
+type; the definition is only queried the first time an attribute is looked
+up. The keyable and channel box state set on a plug is not part of the
+schema, query it from the plug. Dynamic (user defined) attributes are
+queried from the node each time.
+The cache can be saved to disk and loaded in later sessions.
+
+Example:
+    schema.get_attr('pCube1', 'tx').default  # 0.0
+    schema.save('/tmp/schema.json')
+    schema.load('/tmp/schema.json')  # in a new session
+"""
+
+import json
+from collections import OrderedDict, namedtuple
+
+import maya.cmds as cmds
+
+
+AttrSchema = namedtuple(
+    'AttrSchema',
+    ['long', 'short', 'keyable', 'channel_box', 'type', 'default']
+)
+
+# node type: NodeSchema
+_SCHEMAS = dict()
+
+
+class NodeSchema(object):
+    """
+    Class for the static attributes of a node type
+    """
+
+    def __init__(self, attrs):
+        """
+        Initialization
+
+        :param attrs: list. AttrSchema in maya attribute order
+        """
+        self._attrs = OrderedDict((attr.long, attr) for attr in attrs)
+        self._shorts = dict((attr.short, attr.long) for attr in attrs)
+
+    def __contains__(self, name):
+        return name in self._attrs or name in self._shorts
+
+    def __iter__(self):
+        return iter(self._attrs.values())
+
+    def __len__(self):
+        return len(self._attrs)
+
+    @property
+    def long_names(self):
+        """
+        :return: list. attribute long names in maya attribute order
+        """
+        return list(self._attrs)
+
+    def find(self, name):
+        """
+        Find an attribute by long or short name
+
+        :param name: str. attribute name
+        :return: AttrSchema. None if not a static attribute of the type
+        """
+        attr = self._attrs.get(name)
+        if attr is None and name in self._shorts:
+            attr = self._attrs[self._shorts[name]]
+        return attr
+
+    def update(self, attr):
+        """
+        Replace the schema of an attribute
+
+        :param attr: AttrSchema. attribute schema
+        """
+        self._attrs[attr.long] = attr
+        self._shorts[attr.short] = attr.long
+
+
+def _query_attr(node, long_name, short_name=None):
+    """
+    Query the schema of a single attribute from its definition
+
+    :param node: str. maya node
+    :param long_name: str. attribute long name
+    :param short_name: str. attribute short name, queried if not given
+    :return: AttrSchema.
+    """
+    if short_name is None:
+        short_name = cmds.attributeQuery(long_name, node=node, shortName=1)
+    keyable = cmds.attributeQuery(long_name, node=node, keyable=1)
+    default = cmds.attributeQuery(long_name, node=node, listDefault=1)
+    return AttrSchema(
+        long_name,
+        short_name,
+        bool(keyable),
+        bool(keyable or cmds.attributeQuery(
+            long_name, node=node, channelBox=1)),
+        cmds.attributeQuery(long_name, node=node, attributeType=1),
+        default[0] if default else None
+    )
+
+
+def get_schema(node, node_type=None):
+    """
+    Get the static attribute schema of the node type,
+    built from the node the first time the node type is seen
+
+    :param node: str. maya node
+    :param node_type: str. node type, queried if not given
+    :return: NodeSchema.
+    """
+    if node_type is None:
+        node_type = cmds.nodeType(node)
+    if node_type in _SCHEMAS:
+        return _SCHEMAS[node_type]
+
+    longs = cmds.listAttr(node) or list()
+    shorts = cmds.listAttr(node, shortNames=1) or list()
+    if len(longs) != len(shorts):
+        shorts = [None] * len(longs)
+    dynamic_attrs = set(cmds.listAttr(node, userDefined=1) or list())
+
+    # the definition is resolved on first lookup, see get_attr()
+    _SCHEMAS[node_type] = NodeSchema([
+        AttrSchema(long_name, short_name, None, None, None, None)
+        for long_name, short_name in zip(longs, shorts)
+        if long_name not in dynamic_attrs
+    ])
+    return _SCHEMAS[node_type]
+
+
+def get_attr(node, name, node_type=None):
+    """
+    Get the schema of a node attribute, static attributes are answered from
+    the node type schema, dynamic attributes are queried from the node
+
+    :param node: str. maya node
+    :param name: str. attribute long or short name
+    :param node_type: str. node type, queried if not given
+    :return: AttrSchema. None if the attribute doesn't exist
+    """
+    node_schema = get_schema(node, node_type)
+    attr = node_schema.find(name)
+    if attr is not None:
+        if attr.type is None:
+            attr = _query_attr(node, attr.long, attr.short)
+            node_schema.update(attr)
+        return attr
+
+    if not cmds.attributeQuery(name, node=node, exists=1):
+        return None
+    return _query_attr(
+        node, cmds.attributeQuery(name, node=node, longName=1))
+
+
+def get_attrs(node, node_type=None, resolve=1):
+    """
+    Get the schema of all attributes of a node, dynamic attributes last
+
+    :param node: str. maya node
+    :param node_type: str. node type, queried if not given
+    :param resolve: bool. resolve the definition of every attribute,
+                    otherwise keyable, channel box, type and default are
+                    None for attributes not looked up yet
+    :return: list. AttrSchema
+    """
+    if node_type is None:
+        node_type = cmds.nodeType(node)
+    attrs = list(get_schema(node, node_type))
+    if resolve:
+        attrs = [get_attr(node, attr.long, node_type) for attr in attrs]
+    for long_name in cmds.listAttr(node, userDefined=1) or list():
+        attrs.append(get_attr(node, long_name, node_type))
+    return attrs
+
+
+def clear(node_type=None):
+    """
+    Clear cached schemas
+
+    :param node_type: str. only clear the schema of this node type
+    """
+    if node_type is None:
+        _SCHEMAS.clear()
+    else:
+        _SCHEMAS.pop(node_type, None)
+
+
+def save(path):
+    """
+    Save cached schemas to disk
+
+    :param path: str. json file path
+    """
+    data = dict(
+        (node_type, [list(attr) for attr in node_schema])
+        for node_type, node_schema in _SCHEMAS.items()
+    )
+    with open(path, 'w') as f:
+        json.dump(data, f)
+
+
+def load(path):
+    """
+    Load schemas saved by a previous session into the cache
+
+    :param path: str. json file path
+    """
+    with open(path) as f:
+        data = json.load(f)
+
+    for node_type, attrs in data.items():
+        _SCHEMAS[node_type] = NodeSchema([AttrSchema(*attr) for attr in attrs])
@@ -0,0 +1,322 @@
+"""
+Array backed channel state snapshot
+
+The value, lock, keyable and channel box state of N nodes x M attributes
+is stored in typed arrays indexing into node and attribute string tables,
+it is captured and compared through MPlug in internal units and only
+differences are written back on restore, converted to ui units
+
+Example:
+    before = snapshot.ChannelSnapshot.capture(cmds.ls(type='transform'))
+    before.save('/tmp/channels.snap')
+    # ... destructive tooling ...
+    before.restore()
+"""
+
+import struct
+import sys
+from array import array
+from collections import OrderedDict
+
+import maya.cmds as cmds
+from maya.api import OpenMaya as om
+
+from . import channel, dag
+from .decorator import undo_chunk
+
+
+MAGIC = b'CHSN'
+VERSION = 1
+# magic, version, little endian, node count, attribute count, entry count
+_HEADER = struct.Struct('<4sHBIII')
+
+# state flag bits
+LOCK = 1
+KEYABLE = 2
+CHANNEL_BOX = 4
+
+# attribute types holding a single number
+_NUMERIC_TYPES = (
+    om.MFn.kNumericAttribute,
+    om.MFn.kUnitAttribute,
+    om.MFn.kEnumAttribute,
+)
+
+
+def _get_flags(plug):
+    """
+    :param plug: MPlug. maya plug
+    :return: int. LOCK, KEYABLE and CHANNEL_BOX bits of the plug
+    """
+    return (
+        (LOCK if plug.isLocked else 0)
+        | (KEYABLE if plug.isKeyable else 0)
+        | (CHANNEL_BOX if plug.isChannelBox else 0)
+    )
+
+
+def iter_channel_plugs(mobject):
+    """
+    Iterate keyable and channel box plugs of a node holding a single number
+
+    :param mobject: MObject. maya node
+    :return: generator. (attribute long name, MPlug)
+    """
+    fn_node = om.MFnDependencyNode(mobject)
+    for i in range(fn_node.attributeCount()):
+        attribute = fn_node.attribute(i)
+        if not any(attribute.hasFn(typ) for typ in _NUMERIC_TYPES):
+            continue
+        # double3 and alike are numeric compounds, their children are listed
+        if attribute.hasFn(om.MFn.kCompoundAttribute):
+            continue
+        fn_attr = om.MFnAttribute(attribute)
+        if fn_attr.array:
+            continue
+        if not fn_attr.parent.isNull() and \
+                om.MFnAttribute(fn_attr.parent).array:
+            continue
+        plug = om.MPlug(mobject, attribute)
+        if plug.isKeyable or plug.isChannelBox:
+            yield fn_attr.name, plug
+
+
+class ChannelSnapshot(object):
+    """
+    Class for the channel state of many nodes stored in typed arrays
+    """
+
+    def __init__(self, nodes=None, attrs=None):
+        """
+        Initialization
+
+        :param nodes: list. node name string table
+        :param attrs: list. attribute name string table
+        """
+        self.nodes = list(nodes or list())
+        self.attrs = list(attrs or list())
+        self.node_ids = array('I')
+        self.attr_ids = array('I')
+        self.values = array('d')
+        self.flags = array('B')
+        self._attr_lookup = dict(
+            (attr, i) for i, attr in enumerate(self.attrs))
+
+    def __len__(self):
+        return len(self.values)
+
+    def __eq__(self, other):
+        return not self.diff(other)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def _add(self, node_id, attr, value, flags):
+        """
+        Add a single entry
+
+        :param node_id: int. index in the node string table
+        :param attr: str. attribute long name
+        :param value: float. attribute value
+        :param flags: int. LOCK, KEYABLE and CHANNEL_BOX bits
+        """
+        attr_id = self._attr_lookup.get(attr)
+        if attr_id is None:
+            attr_id = self._attr_lookup[attr] = len(self.attrs)
+            self.attrs.append(attr)
+        self.node_ids.append(node_id)
+        self.attr_ids.append(attr_id)
+        self.values.append(value)
+        self.flags.append(flags)
+
+    @classmethod
+    def capture(cls, nodes, attrs=None):
+        """
+        Capture the channel state of nodes through MPlug
+
+        :param nodes: list. maya nodes
+        :param attrs: list. attribute names, defaults to all keyable and
+                      channel box attributes holding a single number
+        :return: ChannelSnapshot.
+        """
+        snapshot = cls(nodes)
+        mobjects = dag.get_dag_nodes(snapshot.nodes)
+        handles = set(
+            om.MObjectHandle(mobject).hashCode() for mobject in mobjects)
+        if len(handles) != len(mobjects):
+            raise ValueError('nodes are not unique: {}'.format(nodes))
+
+        for node_id, mobject in enumerate(mobjects):
+            if attrs is None:
+                plugs = iter_channel_plugs(mobject)
+            else:
+                fn_node = om.MFnDependencyNode(mobject)
+                plugs = (
+                    (attr, fn_node.findPlug(attr, False)) for attr in attrs
+                )
+            for attr, plug in plugs:
+                snapshot._add(node_id, attr, plug.asDouble(), _get_flags(plug))
+        return snapshot
+
+    def recapture(self):
+        """
+        Capture the current state of the same entries
+
+        :return: ChannelSnapshot.
+        """
+        snapshot = ChannelSnapshot(self.nodes, self.attrs)
+        fn_nodes = self._get_fn_nodes()
+
+        for node_id, attr_id in zip(self.node_ids, self.attr_ids):
+            plug = fn_nodes[node_id].findPlug(self.attrs[attr_id], False)
+            snapshot.node_ids.append(node_id)
+            snapshot.attr_ids.append(attr_id)
+            snapshot.values.append(plug.asDouble())
+            snapshot.flags.append(_get_flags(plug))
+        return snapshot
+
+    def _get_fn_nodes(self):
+        """
+        :return: list. MFnDependencyNode of each node in the string table
+        """
+        return [
+            om.MFnDependencyNode(mobject)
+            for mobject in dag.get_dag_nodes(self.nodes)
+        ]
+
+    def iter_entries(self):
+        """
+        :return: generator. (attribute full name, value, flags)
+        """
+        for node_id, attr_id, value, flags in zip(
+                self.node_ids, self.attr_ids, self.values, self.flags):
+            yield (
+                '{}.{}'.format(self.nodes[node_id], self.attrs[attr_id]),
+                value,
+                flags
+            )
+
+    def diff(self, other):
+        """
+        Compare with another snapshot, snapshots sharing the same layout
+        (e.g. from recapture) are compared array against array
+
+        :param other: ChannelSnapshot. snapshot to compare with
+        :return: dict. attribute full name: (value, flags, other value,
+                 other flags), None for the side missing the attribute
+        """
+        if (self.nodes == other.nodes and self.attrs == other.attrs
+                and self.node_ids == other.node_ids
+                and self.attr_ids == other.attr_ids):
+            changes = OrderedDict()
+            states = zip(self.values, self.flags, other.values, other.flags)
+            for i, state in enumerate(states):
+                if state[0] != state[2] or state[1] != state[3]:
+                    name = '{}.{}'.format(
+                        self.nodes[self.node_ids[i]],
+                        self.attrs[self.attr_ids[i]]
+                    )
+                    changes[name] = state
+            return changes
+
+        entries = OrderedDict(
+            (name, (value, flags))
+            for name, value, flags in self.iter_entries()
+        )
+        other_entries = OrderedDict(
+            (name, (value, flags))
+            for name, value, flags in other.iter_entries()
+        )
+        changes = OrderedDict()
+        for name, state in entries.items():
+            other_state = other_entries.get(name, (None, None))
+            if state != other_state:
+                changes[name] = state + other_state
+        for name, other_state in other_entries.items():
+            if name not in entries:
+                changes[name] = (None, None) + other_state
+        return changes
+
+    @undo_chunk
+    def restore(self):
+        """
+        Restore the captured state as a single undo step,
+        only the entries that differ from the current state are written
+
+        :return: dict. changed attribute full name: (current value,
+                 current flags, restored value, restored flags),
+                 values in internal units
+        """
+        changes = self.recapture().diff(self)
+        fn_nodes = dict(zip(self.nodes, self._get_fn_nodes()))
+        for attribute, (value, flags, new_value, new_flags) in changes.items():
+            if value != new_value:
+                # a locked value can't be set, unlock first and lock after
+                if flags & LOCK:
+                    cmds.setAttr(attribute, lock=0)
+                    flags &= ~LOCK
+                # values are captured in internal units, cmds uses ui units
+                node, _, attr = attribute.partition('.')
+                plug = fn_nodes[node].findPlug(attr, False)
+                cmds.setAttr(attribute, channel.to_ui_value(plug, new_value))
+            if flags == new_flags:
+                continue
+
+            kwargs = {
+                'lock': bool(new_flags & LOCK),
+                'keyable': bool(new_flags & KEYABLE),
+            }
+            # channel box state only applies to non keyable attributes
+            if not new_flags & KEYABLE:
+                kwargs['channelBox'] = bool(new_flags & CHANNEL_BOX)
+            cmds.setAttr(attribute, **kwargs)
+        return changes
+
+    def save(self, path):
+        """
+        Save the snapshot to a compact binary file
+
+        :param path: str. file path
+        """
+        strings = '\0'.join(self.nodes + self.attrs).encode('utf-8')
+        with open(path, 'wb') as f:
+            f.write(_HEADER.pack(
+                MAGIC,
+                VERSION,
+                sys.byteorder == 'little',
+                len(self.nodes),
+                len(self.attrs),
+                len(self)
+            ))
+            f.write(struct.pack('<I', len(strings)))
+            f.write(strings)
+            for data in (self.node_ids, self.attr_ids,
+                         self.values, self.flags):
+                data.tofile(f)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Load a snapshot saved by save()
+
+        :param path: str. file path
+        :return: ChannelSnapshot.
+        """
+        with open(path, 'rb') as f:
+            magic, version, little, node_count, attr_count, count = \
+                _HEADER.unpack(f.read(_HEADER.size))
+            if magic != MAGIC or version != VERSION:
+                raise ValueError('{} is not a channel snapshot'.format(path))
+
+            size, = struct.unpack('<I', f.read(4))
+            strings = f.read(size).decode('utf-8').split('\0') if size else []
+            snapshot = cls(strings[:node_count], strings[node_count:])
+            if len(snapshot.attrs) != attr_count:
+                raise ValueError('{} string table is corrupt'.format(path))
+
+            for data in (snapshot.node_ids, snapshot.attr_ids,
+                         snapshot.values, snapshot.flags):
+                data.fromfile(f, count)
+                if bool(little) != (sys.byteorder == 'little'):
+                    data.byteswap()
+        return snapshot
@@ -37,10 +37,22 @@ class Curve(object):
         :param name: str. transform of the curve node
         :return: Curve.
         """
-        shape_names = hierarchy.get_shape_from_xform(name, check_unique_child=0)
-        shapes = [shape.Shape.from_shape(s_name) for s_name in shape_names]
+        return cls.from_transforms([name])[0]
 
-        return cls(shapes)
+    @classmethod
+    def from_transforms(cls, names):
+        """
+        Create Curve objects of many curve transform nodes, the shapes of
+        all transforms are resolved in one pass
+
+        :param names: list. transforms of the curve nodes
+        :return: list. Curve of each transform, in the same order
+        """
+        shapes = hierarchy.get_shapes_from_xforms(names)
+        return [
+            cls([shape.Shape.from_shape(s_name) for s_name in shapes[name]])
+            for name in names
+        ]
 
     @classmethod
     def from_dict(cls, data):
@@ -25,13 +25,9 @@ def merge_curves(name, curves=None):
             return 0
 
     shapes = list()
-    for xform in curves:
-        shape = hierarchy.get_shape_from_xform(
-            xform,
-            check_unique_child=0
-        )
-        cmds.makeIdentity(xform, apply=1, r=1, t=1, s=1)
-        shapes.extend(shape)
+    for xform_shapes in hierarchy.get_shapes_from_xforms(curves).values():
+        shapes.extend(xform_shapes)
+    cmds.makeIdentity(curves, apply=1, r=1, t=1, s=1)
 
     parent = cmds.createNode('transform', n=name)
     cmds.parent(shapes, parent, s=1, r=1)
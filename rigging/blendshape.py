@@ -1,6 +1,9 @@
 import maya.cmds as cmds
+from maya.api import OpenMaya as om
 from pipelineUtil.common import algorithm
 
+from ..common import dag
+
 
 def get_blendshape_targets(blendshape):
     """
@@ -40,8 +43,8 @@ def get_container_blendshapes(mobject):
     :param mobject: str. maya container node
     :return: list. blendshape nodes
     """
-    nodes = list()
-    for node in cmds.listHistory(mobject):
-        if cmds.nodeType(node) == 'blendShape':
-            nodes.append(node)
-    return nodes
+    handles = dag.get_upstream_nodes(
+        dag.get_dag_node(mobject),
+        [om.MFn.kBlendShape]
+    )
+    return [dag.get_node_name(handle.object()) for handle in handles]
@@ -1,9 +1,10 @@
 import logging
 
 import maya.cmds as cmds
+from maya.api import OpenMaya as om
 from pipelineUtil.dataType import vector
 
-from ..common import hierarchy
+from ..common import dag, hierarchy
 
 
 logger = logging.getLogger(__name__)
@@ -16,12 +17,23 @@ def get_skin_from_joint(jnt):
     :param jnt: str. single jnt, preferably jnt root
     :return: list. mesh transforms
     """
-    cls = cmds.listConnections(jnt, type='skinCluster')
-    cls = list(set(cls))
+    cls = dag.get_downstream_nodes(
+        dag.get_dag_node(jnt),
+        [om.MFn.kSkinClusterFilter],
+        max_depth=1
+    )
 
     meshes = list()
     for cl in cls:
-        meshes += cmds.listConnections(cl, type='mesh')
+        shapes = dag.get_downstream_nodes(
+            cl.object(),
+            [om.MFn.kMesh],
+            max_depth=1
+        )
+        meshes += [
+            dag.get_node_name(om.MFnDagNode(shape.object()).parent(0))
+            for shape in shapes
+        ]
     return meshes
 
 
@@ -33,18 +45,28 @@ def get_joint_from_skin(mesh):
     :return: list. joints
     """
     if cmds.objectType(mesh, isType='transform'):
-        mesh = hierarchy.get_shape_from_xform(mesh)
+        mesh = hierarchy.get_shape_from_xform(mesh)[0]
     elif cmds.objectType(mesh, isType='mesh'):
         pass
     else:
         raise RuntimeError("skin selected is neither transform or mesh type")
 
-    cls = cmds.listConnections(mesh, type='skinCluster')
+    # stay in the deformer chain of the mesh, don't walk through a skin
+    # cluster or into other DAG nodes (blendshape targets, joints, controls)
+    cls = dag.iter_dg(
+        dag.get_dag_node(mesh),
+        types=[om.MFn.kSkinClusterFilter],
+        prune=lambda mobject: mobject.hasFn(om.MFn.kSkinClusterFilter) or
+        mobject.hasFn(om.MFn.kDagNode)
+    )
     jnts = list()
     for cl in cls:
-        jnt = cmds.listConnections(cl, type='joint')
-        jnt = list(set(jnt))
-        jnts += jnt
+        jnt = dag.get_upstream_nodes(
+            cl.object(),
+            [om.MFn.kJoint],
+            max_depth=1
+        )
+        jnts += [dag.get_node_name(handle.object()) for handle in jnt]
     return jnts
 
 
@@ -58,8 +80,7 @@ def enable_joint_visibility(roots):
         roots = [roots]
 
     for root in roots:
-        jnts = hierarchy.get_hierarchy_of_type(root, 'joint')
-        for jnt in jnts:
+        for jnt in hierarchy.iter_hierarchy(root, 'joint'):
             # visibility
             try:
                 cmds.setAttr('{}.v'.format(jnt), lock=0)